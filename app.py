@@ -1,18 +1,28 @@
+import base64
+import hashlib
 import hmac
+import io
 import json
 import os
 import secrets
+import time
 from datetime import datetime, timedelta, timezone
 from functools import wraps
+from urllib.parse import urlencode
 
 from dotenv import load_dotenv
 from flask import (
-    Flask, jsonify, redirect, render_template, request,
-    send_from_directory, session, url_for,
+    Flask, before_render_template, g, jsonify, make_response, redirect, render_template,
+    request, send_from_directory, session, stream_with_context, template_rendered, url_for,
 )
+from markupsafe import Markup
 
+import cache
 import db
 import discord
+import jsonstream
+import metrics
+import profiling
 
 load_dotenv()
 
@@ -22,22 +32,9 @@ app.permanent_session_lifetime = timedelta(days=30)
 
 API_TOKEN = os.environ.get("API_TOKEN", "")
 
-SOURCE_TYPES = [("ai", "AI"), ("personal", "Personal"), ("cookbook", "Cookbook"), ("online", "Online")]
-
-NEW_DAYS = 7
-
-
-def _is_new(created_at):
-    if not created_at:
-        return False
-    try:
-        dt = datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
-        return (datetime.now(timezone.utc) - dt).days < NEW_DAYS
-    except ValueError:
-        return False
+app.teardown_appcontext(db.release_db)
 
-
-app.jinja_env.globals["is_new"] = _is_new
+SOURCE_TYPES = [("ai", "AI"), ("personal", "Personal"), ("cookbook", "Cookbook"), ("online", "Online")]
 
 
 # --- Auth decorators ---
@@ -74,8 +71,128 @@ def check_csrf(f):
     return decorated
 
 
+# --- Conditional GET ---
+
+# Endpoints wrapped in @conditional. They render no forms, so they skip the
+# CSRF cookie and anonymous responses stay shareable by a reverse proxy.
+_CACHEABLE_ENDPOINTS = set()
+
+PUBLIC_CACHE_CONTROL = "public, no-cache"
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+
+def conditional(f=None, *, negotiate=None):
+    """Answer If-None-Match from the data version.
+
+    The validators are derived from db.get_data_version() before the view
+    runs, so a revalidation that hits costs one primary-key read and no
+    rendering. HTML pages also vary on admin status and the current hour
+    (the "New" badges roll over on hour boundaries).
+
+    Views that pick their format from the Accept header pass
+    negotiate=<function returning the chosen format>: the choice goes into
+    the ETag and the response carries Vary: Accept.
+    """
+    if f is None:
+        return lambda f: conditional(f, negotiate=negotiate)
+    _CACHEABLE_ENDPOINTS.add(f.__name__)
+
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        version, modified_at = db.get_data_version()
+        last_modified = datetime.strptime(modified_at, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+        parts = [str(version), request.full_path]
+        if negotiate is not None:
+            parts.append(negotiate())
+        if request.path.startswith("/api/"):
+            cache_control = PRIVATE_CACHE_CONTROL
+        else:
+            hour = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+            last_modified = max(last_modified, hour)
+            is_admin = session.get("is_admin", False)
+            parts += [hour.strftime("%Y%m%d%H"), "admin" if is_admin else "public"]
+            cache_control = PRIVATE_CACHE_CONTROL if is_admin else PUBLIC_CACHE_CONTROL
+        etag = hashlib.sha1("|".join(parts).encode()).hexdigest()[:20]
+
+        # Only the ETag can answer 304: modified_at has one-second
+        # resolution, so a second write in the same second leaves
+        # Last-Modified unchanged and If-Modified-Since would go stale.
+        # Last-Modified is still sent, for information.
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        response.headers["Cache-Control"] = cache_control
+        if negotiate is not None:
+            response.vary.add("Accept")
+        return response
+    return decorated
+
+
+# --- Instrumentation ---
+
+before_render_template.connect(metrics.template_started, app)
+template_rendered.connect(metrics.template_finished, app)
+
+
+@app.before_request
+def start_timing():
+    metrics.start_request()
+
+
+@app.after_request
+def add_server_timing(response):
+    # Unmatched URLs share one label so 404 probes can't grow the metrics
+    route = request.endpoint or "unmatched"
+    response.headers["Server-Timing"] = metrics.finish_request(route, request.method, response.status_code)
+    return response
+
+
+def _may_profile():
+    if session.get("is_admin"):
+        return True
+    auth = request.headers.get("Authorization", "")
+    return bool(API_TOKEN) and hmac.compare_digest(auth, f"Bearer {API_TOKEN}")
+
+
+@app.before_request
+def start_profile():
+    # Only requests that ask for a profile pay for the session/token check
+    if request.headers.get("X-Profile") == "1" or request.args.get("profile") == "1":
+        if _may_profile():
+            g.profile_started = time.perf_counter()
+            g.profiler = profiling.start()
+
+
+@app.after_request
+def save_profile(response):
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        name = profiling.save(
+            profiler, request.method, request.full_path.rstrip("?"),
+            response.status_code, time.perf_counter() - g.profile_started,
+        )
+        if name is not None:
+            response.headers["X-Profile-Id"] = name
+    return response
+
+
+@app.teardown_request
+def stop_profile(exc=None):
+    # after_request is skipped when the view raised
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.disable()
+
+
 @app.before_request
 def ensure_csrf_token():
+    if request.endpoint in _CACHEABLE_ENDPOINTS:
+        return
     if "csrf_token" not in session:
         session["csrf_token"] = secrets.token_hex(32)
 
@@ -88,6 +205,58 @@ def inject_globals():
     }
 
 
+WRITE_RETRY_AFTER = 1  # seconds
+
+
+@app.errorhandler(db.WriteQueueFull)
+def write_queue_full(e):
+    # Backpressure from the single-writer queue: ask the client to come back
+    # rather than letting requests pile up behind it
+    if request.path.startswith("/api/"):
+        response = jsonify({"error": "Too many writes in progress, retry shortly"})
+    else:
+        response = make_response("Too many writes in progress, please retry shortly.")
+    response.status_code = 503
+    response.headers["Retry-After"] = str(WRITE_RETRY_AFTER)
+    return response
+
+
+VALID_SOURCE_TYPES = tuple(value for value, _ in SOURCE_TYPES)
+
+
+def _validate_upload(data):
+    """Auto-detect an upload's type and check its field types.
+
+    Returns ("recipe" | "tip", None) or (None, error).
+    """
+    if not isinstance(data, dict):
+        return None, "Item must be a JSON object"
+
+    is_recipe = "ingredients" in data or "directions" in data
+    is_tip = "items" in data
+
+    if "source_type" in data and data["source_type"] not in VALID_SOURCE_TYPES:
+        return None, f"Invalid source_type: must be one of {', '.join(VALID_SOURCE_TYPES)}"
+
+    if is_recipe and is_tip:
+        return None, "Ambiguous: body has both recipe and tip fields"
+    if not is_recipe and not is_tip:
+        return None, "Could not detect type: need 'ingredients'/'directions' for recipe or 'items' for tip"
+
+    if is_recipe:
+        required = ("title", "category", "ingredients", "directions")
+    else:
+        required = ("title", "category", "items")
+    missing = [f for f in required if f not in data]
+    if missing:
+        return None, f"Missing required fields: {', '.join(missing)}"
+    kind = "recipe" if is_recipe else "tip"
+    error = db.record_error(kind, data)
+    if error:
+        return None, error
+    return kind, None
+
+
 # --- Auth routes ---
 
 
@@ -119,6 +288,23 @@ def admin():
     return render_template("admin.html")
 
 
+@app.route("/admin/profiles")
+@require_admin
+def admin_profiles():
+    profiles = profiling.recent()
+    for profile in profiles:
+        profile["top"] = profiling.top_functions(profile["name"], 10)
+    return render_template("admin_profiles.html", profiles=profiles)
+
+
+@app.route("/admin/profiles/<name>")
+@require_admin
+def admin_profile_download(name):
+    if not profiling.exists(name):
+        return "Profile not found", 404
+    return send_from_directory(profiling.PROFILE_DIR, name, as_attachment=True)
+
+
 @app.route("/admin/upload", methods=["POST"])
 @require_admin
 @check_csrf
@@ -131,34 +317,20 @@ def admin_upload():
     except json.JSONDecodeError as e:
         return render_template("admin.html", upload_error=f"Invalid JSON: {e}")
 
-    is_recipe = "ingredients" in data or "directions" in data
-    is_tip = "items" in data
-
-    valid_source_types = ("ai", "personal", "cookbook", "online")
-    if "source_type" in data and data["source_type"] not in valid_source_types:
-        return render_template("admin.html", upload_error=f"Invalid source_type: must be one of {', '.join(valid_source_types)}")
+    kind, error = _validate_upload(data)
+    if error:
+        return render_template("admin.html", upload_error=error)
 
-    if is_recipe and is_tip:
-        return render_template("admin.html", upload_error="Ambiguous: body has both recipe and tip fields")
-    if not is_recipe and not is_tip:
-        return render_template("admin.html", upload_error="Could not detect type: need 'ingredients'/'directions' for recipe or 'items' for tip")
-
-    if is_recipe:
-        missing = [f for f in ("title", "category", "ingredients", "directions") if f not in data]
-        if missing:
-            return render_template("admin.html", upload_error=f"Missing required fields: {', '.join(missing)}")
-        row_id = db.insert_recipe(data)
-        discord.notify_new_recipe(data, row_id)
+    if kind == "recipe":
+        row_id = db.insert_recipe(data, notify=discord.enabled())
+        discord.wake()
         return render_template("admin.html", upload_success={
             "message": f"Recipe created: {data['title']}",
             "url": url_for("recipe", recipe_id=row_id),
         })
     else:
-        missing = [f for f in ("title", "category", "items") if f not in data]
-        if missing:
-            return render_template("admin.html", upload_error=f"Missing required fields: {', '.join(missing)}")
-        row_id = db.insert_tip(data)
-        discord.notify_new_tip(data, row_id)
+        row_id = db.insert_tip(data, notify=discord.enabled())
+        discord.wake()
         return render_template("admin.html", upload_success={
             "message": f"Tip created: {data['title']}",
             "url": url_for("tip", tip_id=row_id),
@@ -168,53 +340,245 @@ def admin_upload():
 @app.route("/admin/export")
 @require_admin
 def admin_export():
-    recipes, tips = db.export_all()
-    data = json.dumps({"recipes": recipes, "tips": tips}, indent=2)
-    return app.response_class(
-        data,
-        mimetype="application/json",
-        headers={"Content-Disposition": "attachment; filename=chatty-foods-export.json"},
+    return _export_response(indent=2, download=True)
+
+
+@app.route("/admin/import", methods=["POST"])
+@require_admin
+@check_csrf
+def admin_import():
+    upload = request.files.get("export_file")
+    if not upload or not upload.filename:
+        return render_template("admin.html", import_error="No file provided")
+    # Werkzeug spools large uploads to a temp file; parse it from there
+    # incrementally rather than reading it into memory
+    started = time.perf_counter()
+    with io.TextIOWrapper(upload.stream, encoding="utf-8") as f:
+        stats = db.import_records(
+            jsonstream.iter_export(f),
+            progress=lambda s: app.logger.info("Import progress: %s", s),
+        )
+    app.logger.info("Import finished in %.1fs: %s", time.perf_counter() - started, stats)
+    return render_template("admin.html", import_result=stats, import_error=stats["error"])
+
+
+# --- Streaming export ---
+
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+def _buffered(pieces):
+    """Join small string pieces into ~EXPORT_CHUNK_SIZE chunks for the wire."""
+    buf, size = [], 0
+    for piece in pieces:
+        buf.append(piece)
+        size += len(piece)
+        if size >= EXPORT_CHUNK_SIZE:
+            yield "".join(buf)
+            buf, size = [], 0
+    if buf:
+        yield "".join(buf)
+
+
+def _export_ndjson():
+    for kind, doc in db.iter_export():
+        # Splice the type tag into the stored document instead of re-encoding it
+        yield f'{{"type":"{kind}",' + doc[1:] + "\n"
+
+
+def _export_json(indent=None):
+    """Stream {"recipes": [...], "tips": [...]} one stored document at a time.
+
+    With indent set the documents are re-encoded so the output matches
+    json.dumps(..., indent=indent); otherwise they are sent as stored.
+    """
+    outer = "\n" + " " * indent if indent else ""
+    inner = "\n" + " " * (indent * 2) if indent else ""
+    yield "{" + outer + '"recipes": ['
+    section, first = "recipe", True
+    for kind, doc in db.iter_export():
+        if kind != section:
+            yield ("" if first else outer) + "]," + (outer or " ") + '"tips": ['
+            section, first = kind, True
+        text = json.dumps(json.loads(doc), indent=indent) if indent else doc
+        yield ("" if first else ",") + (inner or ("" if first else " ")) + text.replace("\n", inner or "\n")
+        first = False
+    if section == "recipe":
+        yield ("" if first else outer) + "]," + (outer or " ") + '"tips": ['
+        first = True
+    yield ("" if first else outer) + "]" + ("\n" if indent else "") + "}"
+
+
+def _export_format():
+    """"ndjson" or "json", from ?format= or else the Accept header."""
+    if request.args.get("format") == "ndjson" or request.accept_mimetypes.best == "application/x-ndjson":
+        return "ndjson"
+    return "json"
+
+
+def _export_response(indent=None, download=False):
+    if _export_format() == "ndjson":
+        body, mimetype, filename = _export_ndjson(), "application/x-ndjson", "chatty-foods-export.ndjson"
+    else:
+        body, mimetype, filename = _export_json(indent), "application/json", "chatty-foods-export.json"
+    headers = {"Content-Disposition": f"attachment; filename={filename}"} if download else {}
+    response = app.response_class(
+        stream_with_context(_buffered(body)), mimetype=mimetype, headers=headers,
     )
+    response.vary.add("Accept")
+    return response
 
 
 # --- Page routes ---
 
 
 @app.route("/")
+@conditional
 def index():
-    recipe_count, tip_count = db.get_counts()
-    recipe_categories = db.get_recipe_categories()
-    tip_categories = db.get_tip_categories()
-    highlighted_recipes = db.get_highlighted_recipes()
-    highlighted_tips = db.get_highlighted_tips()
-    recent_recipes = db.get_recent_recipes(NEW_DAYS)
-    recent_tips = db.get_recent_tips(NEW_DAYS)
-    return render_template(
-        "index.html",
-        recipe_count=recipe_count,
-        tip_count=tip_count,
-        recipe_categories=recipe_categories,
-        tip_categories=tip_categories,
-        highlighted_recipes=highlighted_recipes,
-        highlighted_tips=highlighted_tips,
-        recent_recipes=recent_recipes,
-        recent_tips=recent_tips,
-    )
+    return render_template("index.html", **db.get_home_data())
+
+
+# --- List pages ---
+#
+# /recipes and /tips render the first LIST_PAGE_SIZE rows; the rest arrive
+# through the /rows fragment endpoints as the list scrolls. Pages are keyed
+# by an opaque cursor over the list order (highlight, title, id), so they
+# stay stable while rows are added and cost the same at any depth.
+# /recipes also filters on the facets in db.RECIPE_FACETS, with per-option
+# counts; the filters ride along in every next-page URL.
+
+
+def _encode_cursor(after):
+    return base64.urlsafe_b64encode(json.dumps(after).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(token):
+    """The (highlight, title, id) cursor in `token`, or None if absent or malformed."""
+    if not token:
+        return None
+    try:
+        highlight, title, row_id = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(highlight, int) or not isinstance(title, str) or not isinstance(row_id, int):
+        return None
+    return highlight, title, row_id
+
+
+def _list_args():
+    return request.args.get("category"), _decode_cursor(request.args.get("after"))
+
+
+def _recipe_filters():
+    """The recipe list filters in the query string as {facet: value}; see db.RECIPE_FACETS.
+
+    Values that name no option (including categories with no recipes) are
+    dropped rather than rejected, like a malformed cursor.
+    """
+    filters = {}
+    for name, (_, buckets) in db.RECIPE_FACETS.items():
+        value = request.args.get(name)
+        if not value:
+            continue
+        if buckets is not None:
+            if any(key == value for key, _, _, _ in buckets):
+                filters[name] = value
+        elif name == "highlight":
+            if value == "1":
+                filters[name] = 1
+        elif name == "source_type":
+            if value in VALID_SOURCE_TYPES:
+                filters[name] = value
+        elif any(c["category"] == value for c in db.get_recipe_categories()):
+            filters[name] = value
+    return filters
+
+
+_FACET_TITLES = {
+    "source_type": "Source",
+    "highlight": "Highlighted",
+    "prep": "Prep time",
+    "cook": "Cook time",
+    "total": "Total time",
+    "portions": "Portions",
+}
+
+
+def _facet_links(filters, counts, categories):
+    """Filter bar options per facet: {facet: [{label, count, url, selected}]}.
+
+    Each option's link toggles that value on top of the other filters.
+    """
+    base = url_for("recipes")
+    facets = {}
+    for name, (_, buckets) in db.RECIPE_FACETS.items():
+        if buckets is not None:
+            options = [(key, label) for key, label, _, _ in buckets]
+        elif name == "source_type":
+            options = SOURCE_TYPES
+        elif name == "highlight":
+            options = [(1, "Highlighted")]
+        else:
+            options = [(c["category"], c["category"]) for c in categories]
+        links = []
+        for value, label in options:
+            selected = filters.get(name) == value
+            args = {k: v for k, v in filters.items() if k != name}
+            if not selected:
+                args[name] = value
+            links.append({
+                "label": label,
+                "count": counts[name].get(value, 0),
+                "url": f"{base}?{urlencode(args)}" if args else base,
+                "selected": selected,
+            })
+        facets[name] = links
+    return facets
+
+
+def _list_urls(page_endpoint, rows_endpoint, filters, next_after):
+    """(next page URL, next rows-fragment URL), or (None, None) at the end of the list."""
+    if next_after is None:
+        return None, None
+    args = dict(filters, after=_encode_cursor(next_after))
+    return url_for(page_endpoint, **args), url_for(rows_endpoint, **args)
+
+
+def _rows_response(html, rows_url):
+    response = make_response(html)
+    if rows_url:
+        response.headers["Link"] = f'<{rows_url}>; rel="next"'
+    return response
 
 
 @app.route("/recipes")
+@conditional
 def recipes():
-    category = request.args.get("category")
-    rows = db.get_recipes(category)
-    categories = db.get_recipe_categories()
+    filters, after = _recipe_filters(), _decode_cursor(request.args.get("after"))
+    rows, next_after = db.get_recipes(filters, after)
+    facets = _facet_links(filters, db.get_recipe_facets(filters), db.get_recipe_categories())
+    next_url, rows_url = _list_urls("recipes", "recipe_rows", filters, next_after)
     return render_template(
         "recipes.html",
         recipes=rows,
-        categories=categories,
-        active_category=category,
+        facets=facets,
+        facet_titles=_FACET_TITLES,
+        filters=filters,
+        all_url=url_for("recipes", **{k: v for k, v in filters.items() if k != "category"}),
+        next_url=next_url,
+        rows_url=rows_url,
     )
 
 
+@app.route("/recipes/rows")
+@conditional
+def recipe_rows():
+    filters, after = _recipe_filters(), _decode_cursor(request.args.get("after"))
+    rows, next_after = db.get_recipes(filters, after)
+    _, rows_url = _list_urls("recipes", "recipe_rows", filters, next_after)
+    return _rows_response(render_template("_recipe_rows.html", recipes=rows), rows_url)
+
+
 def _format_date(dt_string):
     if not dt_string:
         return None
@@ -225,72 +589,158 @@ def _format_date(dt_string):
         return None
 
 
+# Detail page bodies are rendered once per (id, updated_at, is_new) and shared
+# by every visitor; per-session bits (admin controls) live in the outer page.
+
+def _recipe_body(header):
+    key, tag = ("recipe", header["id"]), (header["updated_at"], header["is_new"])
+    body = cache.pages.get(key, tag)
+    if body is None:
+        row = db.get_recipe(header["id"])
+        with metrics.phase("json"):
+            ingredients = json.loads(row["ingredients"])
+            directions = json.loads(row["directions"])
+        body = render_template(
+            "_recipe_body.html",
+            recipe=row,
+            ingredients=ingredients,
+            directions=directions,
+            date_display=_format_date(row["created_at"]),
+        )
+        cache.pages.set(key, tag, body)
+    return Markup(body)
+
+
+def _tip_body(header):
+    key, tag = ("tip", header["id"]), (header["updated_at"], header["is_new"])
+    body = cache.pages.get(key, tag)
+    if body is None:
+        row = db.get_tip(header["id"])
+        with metrics.phase("json"):
+            items = json.loads(row["items"])
+        body = render_template(
+            "_tip_body.html",
+            tip=row,
+            items=items,
+            date_display=_format_date(row["created_at"]),
+        )
+        cache.pages.set(key, tag, body)
+    return Markup(body)
+
+
 @app.route("/recipes/<int:recipe_id>")
+@conditional
 def recipe(recipe_id):
-    row = db.get_recipe(recipe_id)
-    if not row:
+    header = db.get_recipe_header(recipe_id)
+    if not header:
         return "Recipe not found", 404
-    ingredients = json.loads(row["ingredients"])
-    directions = json.loads(row["directions"])
-    return render_template(
-        "recipe.html",
-        recipe=row,
-        ingredients=ingredients,
-        directions=directions,
-        date_display=_format_date(row["created_at"]),
-    )
+    return render_template("recipe.html", recipe=header, body=_recipe_body(header))
 
 
 @app.route("/tips")
+@conditional
 def tips():
-    category = request.args.get("category")
-    rows = db.get_tips(category)
+    category, after = _list_args()
+    rows, next_after = db.get_tips(category, after)
     categories = db.get_tip_categories()
-    tips_with_counts = []
-    for row in rows:
-        items = json.loads(row["items"])
-        tips_with_counts.append({
-            "id": row["id"],
-            "title": row["title"],
-            "category": row["category"],
-            "item_count": len(items),
-            "source_type": row["source_type"] or "ai",
-            "highlight": row["highlight"],
-            "created_at": row["created_at"],
-        })
+    next_url, rows_url = _list_urls("tips", "tip_rows", {"category": category} if category else {}, next_after)
     return render_template(
         "tips.html",
-        tips=tips_with_counts,
+        tips=rows,
         categories=categories,
         active_category=category,
+        next_url=next_url,
+        rows_url=rows_url,
     )
 
 
+@app.route("/tips/rows")
+@conditional
+def tip_rows():
+    category, after = _list_args()
+    rows, next_after = db.get_tips(category, after)
+    _, rows_url = _list_urls("tips", "tip_rows", {"category": category} if category else {}, next_after)
+    return _rows_response(render_template("_tip_rows.html", tips=rows), rows_url)
+
+
 @app.route("/tips/<int:tip_id>")
+@conditional
 def tip(tip_id):
-    row = db.get_tip(tip_id)
-    if not row:
+    header = db.get_tip_header(tip_id)
+    if not header:
         return "Tip not found", 404
-    items = json.loads(row["items"])
-    return render_template(
-        "tip.html", tip=row, items=items, date_display=_format_date(row["created_at"])
-    )
+    return render_template("tip.html", tip=header, body=_tip_body(header))
 
 
 @app.route("/conversation/<path:convo>")
+@conditional
 def conversation(convo):
     recipes, tips = db.get_by_conversation(convo)
     return render_template("conversation.html", conversation=convo, recipes=recipes, tips=tips)
 
 
 @app.route("/search")
+@conditional
 def search_results():
     query = request.args.get("q", "").strip()
     if not query:
         return render_template("search.html", query="", recipes=[], tips=[])
     recipes, tips = db.search(query)
+    corrected = None
+    if not recipes and not tips:
+        # Nothing matched as typed: retry with misspelled words corrected
+        corrected = db.correct_query(query)
+        if corrected:
+            recipes, tips = db.search(corrected)
     return render_template(
-        "search.html", query=query, recipes=recipes, tips=tips
+        "search.html", query=query, recipes=recipes, tips=tips, corrected=corrected
+    )
+
+
+COOK_RANKS = ("coverage", "missing")
+COOK_MATCHES = ("any", "all")
+
+
+def _cook_args():
+    """Parse ?ingredients=a,b&rank=&match= (ingredients may also repeat)."""
+    ingredients = []
+    for value in request.args.getlist("ingredients"):
+        ingredients += [i.strip() for i in value.split(",") if i.strip()]
+    rank = request.args.get("rank", "coverage")
+    match = request.args.get("match", "any")
+    if rank not in COOK_RANKS:
+        rank = "coverage"
+    if match not in COOK_MATCHES:
+        match = "any"
+    return ingredients, rank, match
+
+
+def _cook_results(ingredients, rank, match):
+    """Run db.cook_with and split each recipe's ingredients into have/missing."""
+    terms, rows = db.cook_with(ingredients, rank, match)
+    results = []
+    for row in rows:
+        matched = {int(p) for p in row["positions"].split(",")}
+        with metrics.phase("json"):
+            names = [i.get("name", "") if isinstance(i, dict) else str(i) for i in json.loads(row["ingredients"])]
+        result = {k: row[k] for k in row.keys() if k not in ("ingredients", "positions")}
+        result["missing_ingredients"] = [n for p, n in enumerate(names) if p not in matched]
+        results.append(result)
+    return terms, results
+
+
+@app.route("/cook")
+@conditional
+def cook():
+    ingredients, rank, match = _cook_args()
+    terms, results = _cook_results(ingredients, rank, match) if ingredients else ([], [])
+    return render_template(
+        "cook.html",
+        ingredients=", ".join(ingredients),
+        terms=terms,
+        rank=rank,
+        match=match,
+        results=results,
     )
 
 
@@ -345,8 +795,8 @@ def new_recipe():
         s.strip() for s in request.form.getlist("direction") if s.strip()
     ]
 
-    row_id = db.insert_recipe(data)
-    discord.notify_new_recipe(data, row_id)
+    row_id = db.insert_recipe(data, notify=discord.enabled())
+    discord.wake()
     return redirect(url_for("recipe", recipe_id=row_id))
 
 
@@ -381,8 +831,8 @@ def new_tip():
         for n, d in zip(names, details) if n.strip()
     ]
 
-    row_id = db.insert_tip(data)
-    discord.notify_new_tip(data, row_id)
+    row_id = db.insert_tip(data, notify=discord.enabled())
+    discord.wake()
     return redirect(url_for("tip", tip_id=row_id))
 
 
@@ -500,110 +950,261 @@ def delete_tip(tip_id):
 # --- API routes ---
 
 
-def _clean_recipe(row):
-    return {
-        "title": row["title"],
-        "category": row["category"],
-        "prep_time": row["prep_time"],
-        "cook_time": row["cook_time"],
-        "portion_count": row["portion_count"],
-        "ingredients": json.loads(row["ingredients"]) if row["ingredients"] else [],
-        "directions": json.loads(row["directions"]) if row["directions"] else [],
-        "notes": row["notes"],
-        "source_conversation": row["source_conversation"],
-        "created_at": row["created_at"],
-        "source_type": row["source_type"] or "ai",
-        "highlight": bool(row["highlight"]),
-    }
+_JSON_FIELDS = ("ingredients", "directions", "items")
 
 
-def _clean_tip(row):
+def _clean_fields(row, fields):
+    record = {}
+    for field in fields:
+        value = row[field]
+        if field in _JSON_FIELDS:
+            value = json.loads(value) if value else []
+        elif field == "source_type":
+            value = value or "ai"
+        elif field == "highlight":
+            value = bool(value)
+        record[field] = value
+    return record
+
+
+def _page_args(default_fields, count_fields):
+    """Parse ?after=&limit=&category=&source_type=&fields= for list endpoints."""
+    try:
+        after = int(request.args.get("after", 0))
+        limit = int(request.args.get("limit", db.API_PAGE_SIZE))
+    except ValueError:
+        return None, "after and limit must be integers"
+    if limit < 1 or limit > db.API_MAX_PAGE_SIZE:
+        return None, f"limit must be between 1 and {db.API_MAX_PAGE_SIZE}"
+    fields = default_fields
+    if request.args.get("fields"):
+        fields = tuple(f.strip() for f in request.args["fields"].split(",") if f.strip())
+        allowed = ("id",) + default_fields + count_fields
+        unknown = [f for f in fields if f not in allowed]
+        if unknown:
+            return None, f"Unknown fields: {', '.join(unknown)}"
     return {
-        "title": row["title"],
-        "category": row["category"],
-        "items": json.loads(row["items"]) if row["items"] else [],
-        "notes": row["notes"],
-        "source_conversation": row["source_conversation"],
-        "created_at": row["created_at"],
-        "source_type": row["source_type"] or "ai",
-        "highlight": bool(row["highlight"]),
-    }
+        "after": after,
+        "limit": limit,
+        "category": request.args.get("category"),
+        "source_type": request.args.get("source_type"),
+        "fields": fields,
+    }, None
+
+
+def _json_response(text, status=200):
+    return app.response_class(text, status=status, mimetype="application/json")
+
+
+def _page_response(rows, next_after, fields=None):
+    """rows are Row objects to clean to `fields`, or stored JSON documents when fields is None."""
+    if fields is None:
+        response = _json_response("[" + ",".join(rows) + "]")
+    else:
+        with metrics.phase("json"):
+            response = jsonify([_clean_fields(row, fields) for row in rows])
+    if next_after is not None:
+        args = request.args.to_dict()
+        args["after"] = next_after
+        next_url = url_for(request.endpoint, _external=True, **args)
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return response
 
 
 @app.route("/api/upload", methods=["POST"])
 @require_token
 def api_upload():
-    data = request.get_json()
+    with metrics.phase("json"):
+        data = request.get_json()
     if not data:
         return jsonify({"error": "Request body must be JSON"}), 400
 
-    # Auto-detect type
-    is_recipe = "ingredients" in data or "directions" in data
-    is_tip = "items" in data
-
-    # Validate source_type if provided
-    valid_source_types = ("ai", "personal", "cookbook", "online")
-    if "source_type" in data and data["source_type"] not in valid_source_types:
-        return jsonify({"error": f"Invalid source_type: must be one of {', '.join(valid_source_types)}"}), 400
-
-    if is_recipe and is_tip:
-        return jsonify({"error": "Ambiguous: body has both recipe and tip fields"}), 400
-    if not is_recipe and not is_tip:
-        return jsonify({"error": "Could not detect type: need 'ingredients'/'directions' for recipe or 'items' for tip"}), 400
+    kind, error = _validate_upload(data)
+    if error:
+        return jsonify({"error": error}), 400
 
-    if is_recipe:
-        missing = [f for f in ("title", "category", "ingredients", "directions") if f not in data]
-        if missing:
-            return jsonify({"error": f"Missing required fields: {', '.join(missing)}"}), 400
-        row_id = db.insert_recipe(data)
-        discord.notify_new_recipe(data, row_id)
+    if kind == "recipe":
+        row_id = db.insert_recipe(data, notify=discord.enabled())
+        discord.wake()
         return jsonify({"type": "recipe", "id": row_id}), 201
     else:
-        missing = [f for f in ("title", "category", "items") if f not in data]
-        if missing:
-            return jsonify({"error": f"Missing required fields: {', '.join(missing)}"}), 400
-        row_id = db.insert_tip(data)
-        discord.notify_new_tip(data, row_id)
+        row_id = db.insert_tip(data, notify=discord.enabled())
+        discord.wake()
         return jsonify({"type": "tip", "id": row_id}), 201
 
 
+BATCH_MAX_ITEMS = 1000
+
+
+def _batch_items():
+    """Parse a batch body: a JSON array, or NDJSON with one object per line."""
+    raw = request.get_data(as_text=True)
+    if request.mimetype == "application/x-ndjson" or not raw.lstrip().startswith("["):
+        return [json.loads(line) for line in raw.splitlines() if line.strip()]
+    return json.loads(raw)
+
+
+@app.route("/api/upload/batch", methods=["POST"])
+@require_token
+def api_upload_batch():
+    try:
+        with metrics.phase("json"):
+            items = _batch_items()
+    except json.JSONDecodeError as e:
+        return jsonify({"error": f"Invalid JSON: {e}"}), 400
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Request body must be a non-empty JSON array or NDJSON"}), 400
+    if len(items) > BATCH_MAX_ITEMS:
+        return jsonify({"error": f"Too many items: maximum is {BATCH_MAX_ITEMS}"}), 413
+
+    results = []
+    recipes, tips = [], []
+    for index, data in enumerate(items):
+        kind, error = _validate_upload(data)
+        if error:
+            results.append({"index": index, "error": error})
+            continue
+        results.append({"index": index, "type": kind})
+        (recipes if kind == "recipe" else tips).append((index, data))
+
+    recipe_ids, tip_ids = db.insert_many(
+        [d for _, d in recipes], [d for _, d in tips], notify=discord.enabled(),
+    )
+    for (index, _), row_id in zip(recipes + tips, recipe_ids + tip_ids):
+        results[index]["id"] = row_id
+    discord.wake()
+
+    created = len(recipe_ids) + len(tip_ids)
+    return jsonify({
+        "created": created,
+        "errors": len(items) - created,
+        "results": results,
+    }), 201 if created else 400
+
+
 @app.route("/api/recipes")
 @require_token
+@conditional
 def api_recipes():
-    recipes, _ = db.export_all()
-    return jsonify(recipes)
+    args, error = _page_args(db.RECIPE_API_FIELDS, db.RECIPE_COUNT_FIELDS)
+    if error:
+        return jsonify({"error": error}), 400
+    if args["fields"] == db.RECIPE_API_FIELDS:
+        del args["fields"]
+        docs, next_after = db.get_recipe_docs_page(**args)
+        return _page_response(docs, next_after)
+    rows, next_after = db.get_recipes_page(**args)
+    return _page_response(rows, next_after, args["fields"])
 
 
 @app.route("/api/recipes/<int:recipe_id>")
 @require_token
+@conditional
 def api_recipe(recipe_id):
-    row = db.get_recipe(recipe_id)
-    if not row:
+    doc = db.get_recipe_doc(recipe_id)
+    if doc is None:
         return jsonify({"error": "Recipe not found"}), 404
-    return jsonify(_clean_recipe(row))
+    return _json_response(doc)
 
 
 @app.route("/api/tips")
 @require_token
+@conditional
 def api_tips():
-    _, tips = db.export_all()
-    return jsonify(tips)
+    args, error = _page_args(db.TIP_API_FIELDS, db.TIP_COUNT_FIELDS)
+    if error:
+        return jsonify({"error": error}), 400
+    if args["fields"] == db.TIP_API_FIELDS:
+        del args["fields"]
+        docs, next_after = db.get_tips_docs_page(**args)
+        return _page_response(docs, next_after)
+    rows, next_after = db.get_tips_page(**args)
+    return _page_response(rows, next_after, args["fields"])
 
 
 @app.route("/api/tips/<int:tip_id>")
 @require_token
+@conditional
 def api_tip(tip_id):
-    row = db.get_tip(tip_id)
-    if not row:
+    doc = db.get_tip_doc(tip_id)
+    if doc is None:
         return jsonify({"error": "Tip not found"}), 404
-    return jsonify(_clean_tip(row))
+    return _json_response(doc)
+
+
+@app.route("/api/cook")
+@require_token
+@conditional
+def api_cook():
+    ingredients, rank, match = _cook_args()
+    if not ingredients:
+        return jsonify({"error": "ingredients is required"}), 400
+    terms, results = _cook_results(ingredients, rank, match)
+    with metrics.phase("json"):
+        return jsonify({"terms": terms, "rank": rank, "match": match, "recipes": results})
+
+
+@app.route("/api/suggest")
+@conditional
+def api_suggest():
+    # Public (no token): it backs the search box typeahead
+    query = request.args.get("q", "")[:100]
+    suggestions = db.suggest(query)
+    with metrics.phase("json"):
+        # The query is echoed so the client can drop out-of-order responses
+        return jsonify({"q": query, "suggestions": suggestions})
 
 
 @app.route("/api/export")
 @require_token
+@conditional(negotiate=_export_format)
 def api_export():
-    recipes, tips = db.export_all()
-    return jsonify({"recipes": recipes, "tips": tips})
+    return _export_response()
+
+
+@app.route("/metrics")
+@require_token
+def metrics_endpoint():
+    counters = [
+        ("chatty_query_cache_hits_total", "Versioned query cache hits.", db.cache_stats["hits"]),
+        ("chatty_query_cache_misses_total", "Versioned query cache misses.", db.cache_stats["misses"]),
+        ("chatty_page_cache_hits_total", "Rendered detail body cache hits.", cache.pages.hits),
+        ("chatty_page_cache_misses_total", "Rendered detail body cache misses.", cache.pages.misses),
+        ("chatty_facet_cache_hits_total", "Recipe facet count cache hits.", cache.facets.hits),
+        ("chatty_facet_cache_misses_total", "Recipe facet count cache misses.", cache.facets.misses),
+        ("chatty_writes_total", "Record writes committed by the writer thread.", db.write_stats["writes"]),
+        ("chatty_write_commits_total", "Group commits made by the writer thread.", db.write_stats["commits"]),
+        ("chatty_writes_rejected_total", "Writes refused with 503 because the write queue was full.",
+         db.write_stats["rejected"]),
+    ]
+    text = metrics.prometheus_text(counters)
+    return app.response_class(text, mimetype="text/plain; version=0.0.4")
+
+
+SQL_METRICS_MAX_LIMIT = 1000
+
+
+@app.route("/metrics/sql")
+@require_token
+def sql_metrics():
+    """Top statements by total time since startup (needs SQL_TRACE=summary or all)."""
+    if db.SQL_TRACE == "off":
+        return app.response_class("SQL tracing is off; set SQL_TRACE=summary\n", status=404, mimetype="text/plain")
+    try:
+        limit = int(request.args.get("limit", 20))
+    except ValueError:
+        return app.response_class("limit must be an integer\n", status=400, mimetype="text/plain")
+    if limit < 1 or limit > SQL_METRICS_MAX_LIMIT:
+        return app.response_class(
+            f"limit must be between 1 and {SQL_METRICS_MAX_LIMIT}\n", status=400, mimetype="text/plain"
+        )
+    lines = [f"{'total ms':>10} {'count':>8} {'mean ms':>9} {'max ms':>9} {'rows':>9}  statement"]
+    for stat in db.sql_summary(limit):
+        lines.append(
+            f"{stat['total_ms']:>10.1f} {stat['count']:>8} {stat['mean_ms']:>9.2f} "
+            f"{stat['max_ms']:>9.2f} {stat['rows']:>9}  {stat['sql']}"
+        )
+    return app.response_class("\n".join(lines) + "\n", mimetype="text/plain")
 
 
 @app.route("/robots.txt")
@@ -613,4 +1214,5 @@ def robots():
 
 if __name__ == "__main__":
     db.init_db()
+    discord.start_worker()
     app.run(debug=True)
@@ -0,0 +1,6 @@
+"""Benchmarks for the Flask routes against synthetic datasets.
+
+    generate.py  deterministic recipe/tip dataset generator
+    run.py       drives every route through the test client, writes results JSON
+    compare.py   diffs two results files
+"""
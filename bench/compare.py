@@ -0,0 +1,44 @@
+"""Compare two benchmark results files route by route.
+
+Usage:
+    cd chatty-foods
+    .venv/Scripts/python -m bench.compare bench/results/old.json bench/results/new.json
+"""
+
+import argparse
+import json
+
+METRICS = ["throughput_rps", "p50_ms", "p95_ms", "p99_ms"]
+
+
+def _change(old, new):
+    if not old or new is None:
+        return "-"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("old")
+    parser.add_argument("new")
+    args = parser.parse_args()
+    with open(args.old, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+
+    print(f"{old['commit']} -> {new['commit']}")
+    if old["dataset"]["recipes"] != new["dataset"]["recipes"] or old["dataset"]["tips"] != new["dataset"]["tips"]:
+        print("warning: datasets differ in size")
+    before = {r["route"]: r for r in old["results"]}
+    print(f"{'route':<20}" + "".join(f"{m:>22}" for m in METRICS))
+    for result in new["results"]:
+        prev = before.get(result["route"])
+        if prev is None:
+            continue
+        cells = [f"{prev[m]}→{result[m]} {_change(prev[m], result[m])}" for m in METRICS]
+        print(f"{result['route']:<20}" + "".join(f"{c:>22}" for c in cells))
+
+
+if __name__ == "__main__":
+    main()
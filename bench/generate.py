@@ -0,0 +1,183 @@
+"""Fill a database with a deterministic synthetic dataset.
+
+The same seed and sizes always produce the same rows (apart from
+updated_at), so results from different commits are comparable.
+
+Usage:
+    cd chatty-foods
+    .venv/Scripts/python -m bench.generate --db bench.db --recipes 100000 --tips 20000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import db
+
+RECIPE_CATEGORIES = [
+    "chicken", "beef", "pork", "seafood", "vegetarian", "pasta", "soup", "salad",
+    "breakfast", "dessert", "baking", "sauce", "side", "snack", "drinks",
+]
+TIP_CATEGORIES = ["storage", "technique", "substitution", "equipment", "prep", "flavor", "shopping"]
+
+PROTEINS = [
+    "chicken thighs", "chicken breast", "ground beef", "flank steak", "pork shoulder",
+    "pork chops", "salmon", "shrimp", "cod", "tofu", "chickpeas", "black beans", "eggs",
+    "lentils", "halloumi", "mushrooms",
+]
+PANTRY = [
+    "olive oil", "butter", "garlic", "yellow onion", "red onion", "shallot", "ginger",
+    "soy sauce", "fish sauce", "honey", "maple syrup", "brown sugar", "kosher salt",
+    "black pepper", "smoked paprika", "cumin", "coriander", "chili flakes", "oregano",
+    "thyme", "rosemary", "basil", "cilantro", "parsley", "lemon", "lime", "rice vinegar",
+    "balsamic vinegar", "dijon mustard", "tomato paste", "canned tomatoes", "coconut milk",
+    "chicken stock", "heavy cream", "parmesan", "cheddar", "feta", "greek yogurt",
+    "all-purpose flour", "cornstarch", "rice", "spaghetti", "potatoes", "carrots",
+    "celery", "bell pepper", "spinach", "kale", "zucchini", "broccoli", "scallions",
+]
+UNITS = ["tsp", "tbsp", "cup", "cups", "oz", "lb", "g", "cloves", "pinch", ""]
+QUANTITIES = ["1/4", "1/2", "3/4", "1", "1 1/2", "2", "3", "4", "6", "8", "200", "400"]
+STYLES = [
+    "Crispy", "Garlicky", "Smoky", "Lemony", "Spicy", "Sheet-Pan", "One-Pot", "Braised",
+    "Grilled", "Honey-Glazed", "Creamy", "Herby", "Weeknight", "Slow-Cooker", "Miso",
+]
+DISHES = ["Bowls", "Tacos", "Stew", "Stir-Fry", "Bake", "Skillet", "Curry", "Salad", "Pasta", "Wraps"]
+METHODS = [
+    "Heat {a} in a large skillet over medium-high heat.",
+    "Season the {p} generously with {a} and {b}.",
+    "Add {a} and cook, stirring, until fragrant, about 1 minute.",
+    "Sear the {p} until browned on all sides, 6 to 8 minutes.",
+    "Stir in {a} and {b} and bring to a simmer.",
+    "Cover and cook until the {p} is tender, 20 to 25 minutes.",
+    "Whisk {a} with {b} in a small bowl and pour over the pan.",
+    "Roast at 425F until the edges are crisp, about 25 minutes.",
+    "Taste and adjust with more {a} or {b}.",
+    "Finish with {a} and serve immediately.",
+]
+TIP_ITEMS = [
+    "Store {a} in an airtight container for up to {n} days.",
+    "Swap {a} for {b} at a 1:1 ratio.",
+    "Freeze {a} flat in zip-top bags so it thaws in {n} minutes.",
+    "Toast {a} in a dry pan before grinding for deeper flavor.",
+    "Salt {a} at least {n} minutes ahead so it seasons all the way through.",
+    "Keep {a} away from {b}; it speeds up spoilage.",
+    "A splash of {a} brightens anything made with {b}.",
+    "Rest {a} for {n} minutes before slicing.",
+]
+NOTES = [
+    "", "", "Doubles well.", "Leftovers keep for 3 days.", "Better the next day.",
+    "Use whatever herbs are on hand.", "Kids liked this one.",
+]
+SOURCE_TYPES = ["ai", "ai", "ai", "personal", "cookbook", "online"]
+
+START = datetime(2024, 1, 1)
+SPAN_SECONDS = 2 * 365 * 24 * 3600
+RECORDS_PER_CONVERSATION = 6
+CHUNK = 5000
+
+
+def _timestamp(rng):
+    return (START + timedelta(seconds=rng.randrange(SPAN_SECONDS))).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _conversation(rng, created_at, n_conversations):
+    return f"Conversation_{created_at[:10]}_{rng.randrange(n_conversations):06d}"
+
+
+def _ingredient(rng, name):
+    return {"name": name, "amount": f"{rng.choice(QUANTITIES)} {rng.choice(UNITS)}".strip()}
+
+
+def make_recipe(rng, n_conversations):
+    protein = rng.choice(PROTEINS)
+    pantry = rng.sample(PANTRY, rng.randint(4, 14))
+    ingredients = [_ingredient(rng, name) for name in [protein] + pantry]
+    directions = [
+        rng.choice(METHODS).format(p=protein, a=rng.choice(pantry), b=rng.choice(pantry))
+        for _ in range(rng.randint(3, 10))
+    ]
+    created_at = _timestamp(rng)
+    return {
+        "title": f"{rng.choice(STYLES)} {protein.title()} {rng.choice(DISHES)}",
+        "category": rng.choice(RECIPE_CATEGORIES),
+        "prep_time": rng.choice([5, 10, 15, 20, 30]),
+        "cook_time": rng.choice([10, 15, 20, 30, 45, 60, 90, 180]),
+        "portion_count": str(rng.choice([2, 4, 4, 6, 8])),
+        "ingredients": ingredients,
+        "directions": directions,
+        "notes": rng.choice(NOTES),
+        "source_conversation": _conversation(rng, created_at, n_conversations),
+        "created_at": created_at,
+        "source_type": rng.choice(SOURCE_TYPES),
+        "highlight": rng.random() < 0.05,
+    }
+
+
+def make_tip(rng, n_conversations):
+    subject = rng.choice(PANTRY + PROTEINS)
+    items = [
+        {
+            "name": rng.choice(PANTRY).capitalize(),
+            "details": rng.choice(TIP_ITEMS).format(a=subject, b=rng.choice(PANTRY), n=rng.choice([3, 5, 10, 15, 30])),
+        }
+        for _ in range(rng.randint(1, 6))
+    ]
+    created_at = _timestamp(rng)
+    return {
+        "title": f"{subject.capitalize()}: {rng.choice(TIP_CATEGORIES)}",
+        "category": rng.choice(TIP_CATEGORIES),
+        "items": items,
+        "notes": rng.choice(NOTES),
+        "source_conversation": _conversation(rng, created_at, n_conversations),
+        "created_at": created_at,
+        "source_type": rng.choice(SOURCE_TYPES),
+        "highlight": rng.random() < 0.05,
+    }
+
+
+def _fill(conn, sql, make, params, count, rng, n_conversations, index_ingredients=False):
+    for start in range(0, count, CHUNK):
+        records = [make(rng, n_conversations) for _ in range(min(CHUNK, count - start))]
+        conn.execute("BEGIN")
+        ids = db._insert_many(conn, sql, [params(r) for r in records])
+        if index_ingredients:
+            db._index_ingredients(conn, [(i, r["ingredients"]) for i, r in zip(ids, records)], replace=False)
+        conn.commit()
+
+
+def generate(conn, recipes, tips, seed=0):
+    """Insert `recipes` recipe cards and `tips` food tips into `conn`."""
+    n_conversations = max(1, (recipes + tips) // RECORDS_PER_CONVERSATION)
+    _fill(conn, db._INSERT_RECIPE, make_recipe, db._recipe_params, recipes,
+          random.Random(f"recipes-{seed}"), n_conversations, index_ingredients=True)
+    _fill(conn, db._INSERT_TIP, make_tip, db._tip_params, tips,
+          random.Random(f"tips-{seed}"), n_conversations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--db", required=True, help="database file to create (must not exist)")
+    parser.add_argument("--recipes", type=int, default=1000)
+    parser.add_argument("--tips", type=int, default=None, help="defaults to recipes / 5")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if os.path.exists(args.db):
+        raise SystemExit(f"{args.db} already exists")
+    tips = args.tips if args.tips is not None else args.recipes // 5
+
+    db.DB_PATH = os.path.abspath(args.db)
+    db.init_db()
+    conn = db.connect()
+    started = time.perf_counter()
+    generate(conn, args.recipes, tips, args.seed)
+    conn.execute("PRAGMA optimize")
+    conn.close()
+    print(f"Generated {args.recipes} recipes and {tips} tips in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
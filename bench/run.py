@@ -0,0 +1,231 @@
+"""Benchmark every route through the Flask test client.
+
+Builds (or reuses) a generated database, then times each scenario
+sequentially and reports throughput, p50/p95/p99 latency and peak RSS.
+Results are written as JSON, one file per run, named after the commit.
+
+Usage:
+    cd chatty-foods
+    .venv/Scripts/python -m bench.run --recipes 10000
+    .venv/Scripts/python -m bench.run --db bench.db --requests 500 --only search,recipe
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import db
+from bench import generate
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+TOKEN = "bench-token"
+
+SEARCH_TERMS = ["chicken", "garlic", "lemon", "smoky", "crispy salmon", "store", "freeze", "gin"]
+# Typeahead keystrokes, short prefixes and typos included
+SUGGEST_TERMS = ["c", "ch", "chick", "garl", "parmesean", "lemn", "salmon f", "tom"]
+# /recipes filter combinations, from one facet to several
+RECIPE_FILTERS = [
+    "source_type=cookbook",
+    "total=0-15",
+    "highlight=1&cook=61-",
+    "prep=16-30&portions=5-8",
+    "source_type=personal&total=0-15&portions=1-2",
+]
+
+# Scenarios that scan the whole table run fewer iterations
+EXPORT_DIVISOR = 20
+WARMUP = 5
+
+
+def _peak_rss_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _ids(conn, table):
+    return [r[0] for r in conn.execute(f"SELECT id FROM {table} ORDER BY id")]
+
+
+def _sample(conn, table, column):
+    row = conn.execute(f"SELECT {column} FROM {table} WHERE {column} IS NOT NULL LIMIT 1").fetchone()
+    return row[0] if row else ""
+
+
+def scenarios(conn, rng, n_requests):
+    """Return (name, iterations, request_fn) triples; each request_fn(client) -> response."""
+    recipe_ids = _ids(conn, "recipe_cards") or [1]
+    tip_ids = _ids(conn, "food_tips") or [1]
+    conversation = _sample(conn, "recipe_cards", "source_conversation")
+    auth = {"Authorization": f"Bearer {TOKEN}"}
+    export_n = max(3, n_requests // EXPORT_DIVISOR)
+    upload_rng = random.Random("upload")
+
+    def upload(client):
+        return client.post("/api/upload", json=generate.make_recipe(upload_rng, 1000), headers=auth)
+
+    # Writes bump the data version and invalidate cached reads, so they run last
+    return [
+        ("index", n_requests, lambda c: c.get("/")),
+        ("recipes", n_requests, lambda c: c.get("/recipes")),
+        ("recipes_category", n_requests,
+         lambda c: c.get(f"/recipes?category={rng.choice(generate.RECIPE_CATEGORIES)}")),
+        ("recipes_filtered", n_requests,
+         lambda c: c.get(f"/recipes?category={rng.choice(generate.RECIPE_CATEGORIES)}&{rng.choice(RECIPE_FILTERS)}")),
+        ("recipe", n_requests, lambda c: c.get(f"/recipes/{rng.choice(recipe_ids)}")),
+        ("tips", n_requests, lambda c: c.get("/tips")),
+        ("tip", n_requests, lambda c: c.get(f"/tips/{rng.choice(tip_ids)}")),
+        ("conversation", n_requests, lambda c: c.get(f"/conversation/{conversation}")),
+        ("search", n_requests, lambda c: c.get(f"/search?q={rng.choice(SEARCH_TERMS)}")),
+        ("suggest", n_requests, lambda c: c.get(f"/api/suggest?q={rng.choice(SUGGEST_TERMS)}")),
+        ("api_recipes", n_requests, lambda c: c.get("/api/recipes", headers=auth)),
+        ("api_export", export_n, lambda c: c.get("/api/export", headers=auth)),
+        ("api_export_ndjson", export_n, lambda c: c.get("/api/export?format=ndjson", headers=auth)),
+        ("api_upload", n_requests, upload),
+    ]
+
+
+def run_scenario(client, name, iterations, request):
+    for _ in range(min(WARMUP, iterations)):
+        request(client).get_data()
+    timings = []
+    response_bytes = 0
+    errors = 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        resp = request(client)
+        body = resp.get_data()  # drains streamed responses
+        timings.append(time.perf_counter() - t0)
+        response_bytes += len(body)
+        if resp.status_code >= 400:
+            errors += 1
+    elapsed = time.perf_counter() - started
+    timings.sort()
+    ms = lambda v: round(v * 1000, 3)
+    return {
+        "route": name,
+        "requests": iterations,
+        "errors": errors,
+        "throughput_rps": round(iterations / elapsed, 1) if elapsed else None,
+        "p50_ms": ms(_percentile(timings, 50)),
+        "p95_ms": ms(_percentile(timings, 95)),
+        "p99_ms": ms(_percentile(timings, 99)),
+        "max_ms": ms(timings[-1]),
+        "mean_response_bytes": response_bytes // iterations,
+        "peak_rss_kb": _peak_rss_kb(),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--db", help="existing generated database (copied data is modified by uploads)")
+    parser.add_argument("--recipes", type=int, default=1000, help="rows to generate when --db is not given")
+    parser.add_argument("--tips", type=int, default=None, help="defaults to recipes / 5")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per route")
+    parser.add_argument("--only", help="comma-separated route names to run")
+    parser.add_argument("--out", help="results file (default bench/results/<time>-<commit>.json)")
+    args = parser.parse_args()
+
+    os.environ["API_TOKEN"] = TOKEN
+    os.environ["DISCORD_WEBHOOK_URL"] = ""
+    os.environ.setdefault("SECRET_KEY", "bench")
+
+    tmpdir = None
+    if args.db:
+        db.DB_PATH = os.path.abspath(args.db)
+        db.init_db()
+        conn = db.connect()
+    else:
+        tmpdir = tempfile.TemporaryDirectory()
+        db.DB_PATH = os.path.join(tmpdir.name, "bench.db")
+        db.init_db()
+        conn = db.connect()
+        tips = args.tips if args.tips is not None else args.recipes // 5
+        print(f"Generating {args.recipes} recipes and {tips} tips...", flush=True)
+        generate.generate(conn, args.recipes, tips, args.seed)
+        conn.execute("PRAGMA optimize")
+    counts = {
+        "recipes": conn.execute("SELECT COUNT(*) FROM recipe_cards").fetchone()[0],
+        "tips": conn.execute("SELECT COUNT(*) FROM food_tips").fetchone()[0],
+    }
+
+    from app import app
+    client = app.test_client()
+    rng = random.Random(args.seed)
+    only = set(args.only.split(",")) if args.only else None
+
+    results = []
+    print(f"{'route':<20}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'RSS MiB':>10}")
+    for name, iterations, request in scenarios(conn, rng, args.requests):
+        if only and name not in only:
+            continue
+        result = run_scenario(client, name, iterations, request)
+        results.append(result)
+        rss = f"{result['peak_rss_kb'] / 1024:.0f}" if result["peak_rss_kb"] else "-"
+        print(f"{name:<20}{result['throughput_rps']:>10}{result['p50_ms']:>10}"
+              f"{result['p95_ms']:>10}{result['p99_ms']:>10}{rss:>10}", flush=True)
+    conn.close()
+
+    commit = _git_commit()
+    now = datetime.now(timezone.utc)
+    report = {
+        "commit": commit,
+        "timestamp": now.isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": db.sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "dataset": {**counts, "seed": args.seed, "db": args.db},
+        "requests_per_route": args.requests,
+        "peak_rss_kb": _peak_rss_kb(),
+        "results": results,
+    }
+    out = args.out
+    if not out:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        out = os.path.join(RESULTS_DIR, f"{now:%Y%m%dT%H%M%S}-{commit}.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {out}")
+
+    db.close_db()
+    if tmpdir:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
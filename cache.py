@@ -0,0 +1,75 @@
+"""Bounded in-process caches for rendered page fragments and facet counts."""
+
+import os
+import threading
+from collections import OrderedDict
+
+PAGE_CACHE_ENTRIES = int(os.getenv("PAGE_CACHE_ENTRIES", "2000"))
+PAGE_CACHE_BYTES = int(os.getenv("PAGE_CACHE_BYTES", str(32 * 1024 * 1024)))
+FACET_CACHE_ENTRIES = int(os.getenv("FACET_CACHE_ENTRIES", "1000"))
+FACET_CACHE_BYTES = 8 * 1024 * 1024
+
+
+class LRUCache:
+    """LRU map of key -> (tag, text) capped by entry count and total size.
+
+    The tag identifies the version of the source data the text was built
+    from; a lookup with a different tag is a miss, so stale entries are
+    never served even if nobody invalidated them. Values other than text
+    are stored as-is; pass their approximate size as `nbytes`.
+    """
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, tag):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != tag:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, tag, text, nbytes=None):
+        if nbytes is None:
+            nbytes = len(text.encode())
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (tag, text, nbytes)
+            self.size += nbytes
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def discard(self, key):
+        with self._lock:
+            self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[2]
+
+
+# Rendered recipe/tip detail bodies, keyed by ("recipe" | "tip", id)
+pages = LRUCache(PAGE_CACHE_ENTRIES, PAGE_CACHE_BYTES)
+
+# Recipe facet counts, keyed by filter set and tagged with the data version
+facets = LRUCache(FACET_CACHE_ENTRIES, FACET_CACHE_BYTES)
@@ -1,18 +1,248 @@
 import json
+import logging
 import os
+import queue
+import re
 import sqlite3
+import threading
+import time
+from concurrent.futures import Future
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache, wraps
+
+from flask import g, has_app_context
+
+import cache
+import metrics
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(BASE_DIR, "chatty_foods.db")
 
+# Connection tuning, overridable from the environment
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-16000"))  # negative = KiB
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(64 * 1024 * 1024)))
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))  # ms
 
-def get_db():
-    conn = sqlite3.connect(DB_PATH)
+if SQLITE_SYNCHRONOUS not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+    raise ValueError(f"Invalid SQLITE_SYNCHRONOUS: {SQLITE_SYNCHRONOUS}")
+
+# Write path (see write()): "thread" funnels record writes through one
+# writer thread per process, which commits queued writes in groups.
+# WRITE_GROUP_MS=0 groups whatever queued up while the previous commit
+# ran; a few ms more catches stragglers at the cost of lone-write latency.
+DB_WRITER = os.getenv("DB_WRITER", "thread").lower()
+WRITE_QUEUE_SIZE = int(os.getenv("WRITE_QUEUE_SIZE", "256"))
+WRITE_GROUP_MS = float(os.getenv("WRITE_GROUP_MS", "0"))
+WRITE_GROUP_MAX = int(os.getenv("WRITE_GROUP_MAX", "100"))
+
+if DB_WRITER not in ("thread", "off"):
+    raise ValueError(f"Invalid DB_WRITER: {DB_WRITER}")
+
+_local = threading.local()
+
+
+# SQL tracing, opt-in from the environment:
+#   SQL_TRACE=summary  aggregate time/rows per statement (see sql_summary())
+#   SQL_TRACE=all      also log every statement
+#   SQL_SLOW_MS=N      log statements slower than N ms (works with any SQL_TRACE)
+SQL_TRACE = os.getenv("SQL_TRACE", "off").lower()
+SQL_SLOW_MS = float(os.getenv("SQL_SLOW_MS", "0"))
+
+if SQL_TRACE not in ("off", "summary", "all"):
+    raise ValueError(f"Invalid SQL_TRACE: {SQL_TRACE}")
+
+_tracing = SQL_TRACE != "off" or SQL_SLOW_MS > 0
+
+log = logging.getLogger(__name__)
+sql_log = logging.getLogger("db.sql")
+if SQL_TRACE == "all" and not sql_log.handlers:
+    sql_log.addHandler(logging.StreamHandler())
+    sql_log.setLevel(logging.INFO)
+
+_sql_stats = {}  # normalized statement -> [count, total seconds, max seconds, rows]
+_sql_stats_lock = threading.Lock()
+
+
+def _normalize(sql):
+    sql = re.sub(r"\s+", " ", sql).strip()
+    # IN (?, ?, ?) lists of any length are the same statement
+    return re.sub(r"\?(?:\s*,\s*\?)+", "?, ...", sql)
+
+
+def _shape(parameters):
+    """Describe parameters without logging their values."""
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in parameters.items()) + "}"
+    return "(" + ", ".join(type(v).__name__ for v in parameters) + ")"
+
+
+def _trace(sql, shape, seconds, rows):
+    key = _normalize(sql)
+    if SQL_TRACE != "off":
+        with _sql_stats_lock:
+            stat = _sql_stats.get(key)
+            if stat is None:
+                stat = _sql_stats[key] = [0, 0.0, 0.0, 0]
+            stat[0] += 1
+            stat[1] += seconds
+            stat[2] = max(stat[2], seconds)
+            stat[3] += max(rows, 0)
+    ms = seconds * 1000
+    if SQL_SLOW_MS > 0 and ms >= SQL_SLOW_MS:
+        sql_log.warning("slow query %.1fms rows=%s params=%s: %s", ms, rows, shape, key)
+    elif SQL_TRACE == "all":
+        sql_log.info("%.2fms rows=%s params=%s: %s", ms, rows, shape, key)
+
+
+def sql_summary(limit=20):
+    """Top traced statements by total time, as dicts (empty unless SQL_TRACE is on)."""
+    with _sql_stats_lock:
+        items = sorted(_sql_stats.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+    return [
+        {
+            "sql": sql,
+            "count": count,
+            "total_ms": total * 1000,
+            "mean_ms": total * 1000 / count,
+            "max_ms": worst * 1000,
+            "rows": rows,
+        }
+        for sql, (count, total, worst, rows) in items
+    ]
+
+
+def reset_sql_summary():
+    with _sql_stats_lock:
+        _sql_stats.clear()
+
+
+class _Cursor(sqlite3.Cursor):
+    # Fetches count toward the current request's SQL time (see metrics.py).
+    # While tracing, a row-returning statement is reported once its rows
+    # have been fetched, so its duration includes stepping through them.
+    _pending = None  # (sql, shape, seconds so far) while tracing
+
+    def _fetched(self, started, rows):
+        elapsed = time.perf_counter() - started
+        metrics.observe_fetch(elapsed)
+        if self._pending is not None:
+            sql, shape, seconds = self._pending
+            self._pending = None
+            _trace(sql, shape, seconds + elapsed, rows)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, size=1):
+        started = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._fetched(started, len(rows))
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, len(rows))
+        return rows
+
+    def __iter__(self):
+        if self._pending is None:
+            return super().__iter__()
+        return self._traced_rows()
+
+    def _traced_rows(self):
+        sql, shape, seconds = self._pending
+        self._pending = None
+        rows = 0
+        started = time.perf_counter()
+        try:
+            for row in super().__iter__():
+                rows += 1
+                yield row
+        finally:
+            # Includes time the consumer spent between rows (e.g. streaming)
+            _trace(sql, shape, seconds + time.perf_counter() - started, rows)
+
+
+class _Connection(sqlite3.Connection):
+    def cursor(self, factory=_Cursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        cursor = self.cursor().execute(sql, parameters)
+        elapsed = time.perf_counter() - started
+        metrics.observe_query(elapsed)
+        if _tracing:
+            if cursor.description is None:
+                _trace(sql, _shape(parameters), elapsed, cursor.rowcount)
+            else:
+                cursor._pending = (sql, _shape(parameters), elapsed)
+        return cursor
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        cursor = self.cursor().executemany(sql, seq_of_parameters)
+        elapsed = time.perf_counter() - started
+        metrics.observe_query(elapsed)
+        if _tracing:
+            _trace(sql, "many", elapsed, cursor.rowcount)
+        return cursor
+
+
+def connect():
+    """Open a new tuned connection. Callers own it and must close it."""
+    conn = sqlite3.connect(DB_PATH, timeout=SQLITE_BUSY_TIMEOUT / 1000, factory=_Connection)
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+    conn.execute(f"PRAGMA cache_size = {SQLITE_CACHE_SIZE}")
+    conn.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+    conn.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT}")
     return conn
 
 
+def _thread_connection():
+    # One long-lived connection per thread (and per process, so a connection
+    # opened before a gunicorn fork is never shared with the children).
+    key = (os.getpid(), DB_PATH)
+    if getattr(_local, "key", None) != key:
+        _local.conn = connect()
+        _local.key = key
+    return _local.conn
+
+
+def get_db():
+    """Return the shared connection for the current request or thread."""
+    if has_app_context():
+        if "db" not in g:
+            g.db = _thread_connection()
+        return g.db
+    return _thread_connection()
+
+
+def release_db(exc=None):
+    """Request teardown: hand the thread's connection back in a clean state."""
+    conn = g.pop("db", None)
+    if conn is None:
+        return
+    if exc is not None or conn.in_transaction:
+        conn.rollback()
+
+
+def close_db():
+    """Close this thread's connection (scripts, worker shutdown)."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+    _local.conn = None
+    _local.key = None
+
+
 _RECIPE_SCHEMA = """
     CREATE TABLE IF NOT EXISTS recipe_cards (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -46,16 +276,411 @@ _TIP_SCHEMA = """
 """
 
 
+# Pending Discord notifications, written in the same transaction as the record
+# they announce and delivered by the worker in discord.py.
+_OUTBOX_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS notification_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at TEXT NOT NULL,
+        locked_until TEXT,
+        last_error TEXT
+    )
+"""
+
+
+# A single row bumped by triggers on every change to recipes or tips. Every
+# process (gunicorn worker, script) sees the same counter, so in-process
+# caches keyed on it stay coherent across workers.
+_DATA_VERSION_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS data_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL,
+        modified_at TEXT NOT NULL
+    )
+"""
+
+_DATA_VERSION_TRIGGERS = [
+    f"CREATE TRIGGER IF NOT EXISTS {table}_version_{suffix} AFTER {event} ON {table} BEGIN "
+    "UPDATE data_version SET version = version + 1, "
+    "modified_at = strftime('%Y-%m-%d %H:%M:%S', 'now') WHERE id = 1; END"
+    for table in ("recipe_cards", "food_tips")
+    for suffix, event in (("ai", "INSERT"), ("au", "UPDATE"), ("ad", "DELETE"))
+]
+
+
+# Full-text search mirrors of recipe_cards / food_tips. The JSON columns are
+# flattened to plain text (ingredient names, direction steps, item names and
+# details) so the index only contains words a user would search for.
+
+_RECIPE_FTS_SCHEMA = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS recipe_fts USING fts5(
+        title, ingredients, directions, notes,
+        tokenize = 'porter unicode61 remove_diacritics 2'
+    )
+"""
+
+_TIP_FTS_SCHEMA = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS tip_fts USING fts5(
+        title, items, notes,
+        tokenize = 'porter unicode61 remove_diacritics 2'
+    )
+"""
+
+_RECIPE_FTS_ROW = """
+    SELECT {row}.id, {row}.title,
+        (SELECT group_concat(json_extract(value, '$.name'), ' ')
+            FROM json_each(CASE WHEN json_valid({row}.ingredients) THEN {row}.ingredients ELSE '[]' END)),
+        (SELECT group_concat(value, ' ')
+            FROM json_each(CASE WHEN json_valid({row}.directions) THEN {row}.directions ELSE '[]' END)),
+        {row}.notes
+"""
+
+_TIP_FTS_ROW = """
+    SELECT {row}.id, {row}.title,
+        (SELECT group_concat(json_extract(value, '$.name') || ' ' || ifnull(json_extract(value, '$.details'), ''), ' ')
+            FROM json_each(CASE WHEN json_valid({row}.items) THEN {row}.items ELSE '[]' END)),
+        {row}.notes
+"""
+
+_FTS_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS recipe_fts_ai AFTER INSERT ON recipe_cards BEGIN "
+    "INSERT INTO recipe_fts (rowid, title, ingredients, directions, notes) "
+    + _RECIPE_FTS_ROW.format(row="new") + "; END",
+    "CREATE TRIGGER IF NOT EXISTS recipe_fts_ad AFTER DELETE ON recipe_cards BEGIN "
+    "DELETE FROM recipe_fts WHERE rowid = old.id; END",
+    "CREATE TRIGGER IF NOT EXISTS recipe_fts_au AFTER UPDATE ON recipe_cards BEGIN "
+    "DELETE FROM recipe_fts WHERE rowid = old.id; "
+    "INSERT INTO recipe_fts (rowid, title, ingredients, directions, notes) "
+    + _RECIPE_FTS_ROW.format(row="new") + "; END",
+    "CREATE TRIGGER IF NOT EXISTS tip_fts_ai AFTER INSERT ON food_tips BEGIN "
+    "INSERT INTO tip_fts (rowid, title, items, notes) "
+    + _TIP_FTS_ROW.format(row="new") + "; END",
+    "CREATE TRIGGER IF NOT EXISTS tip_fts_ad AFTER DELETE ON food_tips BEGIN "
+    "DELETE FROM tip_fts WHERE rowid = old.id; END",
+    "CREATE TRIGGER IF NOT EXISTS tip_fts_au AFTER UPDATE ON food_tips BEGIN "
+    "DELETE FROM tip_fts WHERE rowid = old.id; "
+    "INSERT INTO tip_fts (rowid, title, items, notes) "
+    + _TIP_FTS_ROW.format(row="new") + "; END",
+]
+
+
+# Rows per category, so category navigation is an indexed read rather than
+# a GROUP BY over the whole table. Maintained by triggers; kind is "recipe"
+# or "tip".
+
+_CATEGORY_COUNTS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS category_counts (
+        kind TEXT NOT NULL,
+        category TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (kind, category)
+    ) WITHOUT ROWID
+"""
+
+_CATEGORY_KINDS = {"recipe_cards": "recipe", "food_tips": "tip"}
+
+_CATEGORY_ADD = (
+    "INSERT INTO category_counts (kind, category, count) VALUES ('{kind}', new.category, 1) "
+    "ON CONFLICT (kind, category) DO UPDATE SET count = count + 1"
+)
+_CATEGORY_REMOVE = (
+    "UPDATE category_counts SET count = count - 1 WHERE kind = '{kind}' AND category = old.category; "
+    "DELETE FROM category_counts WHERE kind = '{kind}' AND category = old.category AND count <= 0"
+)
+
+_CATEGORY_TRIGGERS = [
+    trigger
+    for table, kind in _CATEGORY_KINDS.items()
+    for trigger in (
+        f"CREATE TRIGGER IF NOT EXISTS {table}_category_ai AFTER INSERT ON {table} BEGIN "
+        + _CATEGORY_ADD.format(kind=kind) + "; END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_category_ad AFTER DELETE ON {table} BEGIN "
+        + _CATEGORY_REMOVE.format(kind=kind) + "; END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_category_au AFTER UPDATE OF category ON {table} "
+        "WHEN old.category IS NOT new.category BEGIN "
+        + _CATEGORY_REMOVE.format(kind=kind) + "; " + _CATEGORY_ADD.format(kind=kind) + "; END",
+    )
+]
+
+
+# Recipe list facets: request parameter -> (SQL expression, buckets). The
+# expressions name columns as {row}column so triggers can point them at
+# new/old. Plain facets filter and count on the expression's value;
+# bucketed ones on ranges of it, as (key, label, low, high) with high None
+# for "and up".
+_TIME_BUCKETS = (
+    ("0-15", "15 min or less", 0, 15),
+    ("16-30", "16-30 min", 16, 30),
+    ("31-60", "31-60 min", 31, 60),
+    ("61-", "Over an hour", 61, None),
+)
+_PORTION_BUCKETS = (
+    ("1-2", "1-2", 1, 2),
+    ("3-4", "3-4", 3, 4),
+    ("5-8", "5-8", 5, 8),
+    ("9-", "9 or more", 9, None),
+)
+RECIPE_FACETS = {
+    "category": ("{row}category", None),
+    "source_type": ("{row}source_type", None),
+    "highlight": ("{row}highlight", None),
+    # Missing times are stored as 0; nullif keeps them out of every bucket
+    "prep": ("nullif({row}prep_time, 0)", _TIME_BUCKETS),
+    "cook": ("nullif({row}cook_time, 0)", _TIME_BUCKETS),
+    "total": ("{row}total_time", _TIME_BUCKETS),
+    # Leading number of "4 servings", "12 cookies"; 0 when there is none
+    "portions": ("CAST({row}portion_count AS INTEGER)", _PORTION_BUCKETS),
+}
+
+# Indexes behind (filtered) list pages: each leads with the equality
+# filters it serves, then the list order, then the remaining facet columns.
+# Carrying those columns lets SQLite reject non-matching rows from the index
+# alone, so a page reads about as many table rows as it returns. They
+# replace the narrower category and highlight indexes for recipe_cards.
+# total_time column definition: NULL when neither time is known
+_TOTAL_TIME = "nullif(ifnull(prep_time, 0) + ifnull(cook_time, 0), 0)"
+
+_FACET_INDEXES = {
+    "list": "highlight DESC, title, id, category, source_type, prep_time, cook_time, total_time, portion_count",
+    "category_list": "category, highlight DESC, title, id, source_type, prep_time, cook_time, total_time, portion_count",
+    "source_type_list": "source_type, highlight DESC, title, id, category, prep_time, cook_time, total_time, portion_count",
+    "category_source_type_list": (
+        "category, source_type, highlight DESC, title, id, prep_time, cook_time, total_time, portion_count"
+    ),
+}
+
+
+def _facet_value(name, row=""):
+    """SQL for a recipe's value of facet `name` (its bucket key for bucketed ones)."""
+    expr, buckets = RECIPE_FACETS[name]
+    expr = expr.format(row=row)
+    if buckets is None:
+        return expr
+    whens = " ".join(
+        f"WHEN {expr} >= {low} THEN '{key}'" if high is None
+        else f"WHEN {expr} BETWEEN {low} AND {high} THEN '{key}'"
+        for key, _, low, high in buckets
+    )
+    return f"CASE {whens} END"
+
+
+# Recipes per combination of facet values, for the filter counts on
+# /recipes. Bucketing keeps the combinations to a few thousand however many
+# recipes there are. Maintained by triggers; a value a recipe lacks (no
+# prep time, no leading number in portion_count) is stored as '' so it
+# still takes part in the primary key.
+
+_FACET_KEY = ", ".join(RECIPE_FACETS)
+
+_FACET_COUNTS_SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS recipe_facet_counts (
+        {", ".join(f"{name} NOT NULL" for name in RECIPE_FACETS)},
+        count INTEGER NOT NULL,
+        PRIMARY KEY ({_FACET_KEY})
+    ) WITHOUT ROWID
+"""
+
+
+def _facet_row(row):
+    return ", ".join(f"ifnull({_facet_value(name, row)}, '')" for name in RECIPE_FACETS)
+
+
+_FACET_ADD = (
+    f"INSERT INTO recipe_facet_counts ({_FACET_KEY}, count) VALUES ({_facet_row('new.')}, 1) "
+    f"ON CONFLICT ({_FACET_KEY}) DO UPDATE SET count = count + 1"
+)
+_FACET_REMOVE = (
+    f"UPDATE recipe_facet_counts SET count = count - 1 WHERE ({_FACET_KEY}) = ({_facet_row('old.')}); "
+    f"DELETE FROM recipe_facet_counts WHERE ({_FACET_KEY}) = ({_facet_row('old.')}) AND count <= 0"
+)
+
+_FACET_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS recipe_facets_ai AFTER INSERT ON recipe_cards BEGIN "
+    + _FACET_ADD + "; END",
+    "CREATE TRIGGER IF NOT EXISTS recipe_facets_ad AFTER DELETE ON recipe_cards BEGIN "
+    + _FACET_REMOVE + "; END",
+    "CREATE TRIGGER IF NOT EXISTS recipe_facets_au AFTER UPDATE OF "
+    "category, source_type, highlight, prep_time, cook_time, portion_count ON recipe_cards "
+    f"WHEN ({_facet_row('old.')}) IS NOT ({_facet_row('new.')}) BEGIN "
+    + _FACET_REMOVE + "; " + _FACET_ADD + "; END",
+]
+
+
+# Typeahead / fuzzy-match vocabulary: every recipe and tip title and every
+# ingredient and item name, lowercased, with how many uses it has. A
+# trigram index over it answers substring lookups ("chick") and supplies
+# candidates for typo matching ("parmesean"). Kept in sync by triggers.
+
+_SUGGEST_SCHEMAS = [
+    """
+    CREATE TABLE IF NOT EXISTS suggest_terms (
+        id INTEGER PRIMARY KEY,
+        term TEXT NOT NULL UNIQUE,
+        phrase TEXT NOT NULL,
+        uses INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS suggest_fts USING fts5(
+        term, content = 'suggest_terms', content_rowid = 'id', tokenize = 'trigram'
+    )
+    """,
+]
+
+# JSON list column holding each table's ingredient / item names
+_SUGGEST_LISTS = {"recipe_cards": "ingredients", "food_tips": "items"}
+
+_SUGGEST_NAME = "CASE type WHEN 'object' THEN json_extract(value, '$.name') WHEN 'text' THEN value END"
+
+
+def _suggest_phrases(table, row):
+    """SELECT of the phrases one row contributes; `row` is new/old in triggers."""
+    col = f"{row}.{_SUGGEST_LISTS[table]}"
+    return (
+        f"SELECT {row}.title AS phrase UNION ALL SELECT {_SUGGEST_NAME} "
+        f"FROM json_each(CASE WHEN json_valid({col}) THEN {col} ELSE '[]' END)"
+    )
+
+
+_SUGGEST_ADD = (
+    "INSERT INTO suggest_terms (term, phrase, uses) "
+    "SELECT lower(trim(phrase)), trim(phrase), 1 FROM ({phrases}) WHERE trim(ifnull(phrase, '')) != '' "
+    "ON CONFLICT (term) DO UPDATE SET uses = uses + 1"
+)
+
+_SUGGEST_REMOVE = (
+    "UPDATE suggest_terms SET uses = uses - ("
+    "SELECT count(*) FROM ({phrases}) WHERE lower(trim(phrase)) = suggest_terms.term) "
+    "WHERE term IN (SELECT lower(trim(phrase)) FROM ({phrases})); "
+    "DELETE FROM suggest_terms WHERE uses <= 0 "
+    "AND term IN (SELECT lower(trim(phrase)) FROM ({phrases}))"
+)
+
+_SUGGEST_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS suggest_fts_ai AFTER INSERT ON suggest_terms BEGIN "
+    "INSERT INTO suggest_fts (rowid, term) VALUES (new.id, new.term); END",
+    "CREATE TRIGGER IF NOT EXISTS suggest_fts_ad AFTER DELETE ON suggest_terms BEGIN "
+    "INSERT INTO suggest_fts (suggest_fts, rowid, term) VALUES ('delete', old.id, old.term); END",
+] + [
+    trigger
+    for table, column in _SUGGEST_LISTS.items()
+    for trigger in (
+        f"CREATE TRIGGER IF NOT EXISTS {table}_suggest_ai AFTER INSERT ON {table} BEGIN "
+        + _SUGGEST_ADD.format(phrases=_suggest_phrases(table, "new")) + "; END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_suggest_ad AFTER DELETE ON {table} BEGIN "
+        + _SUGGEST_REMOVE.format(phrases=_suggest_phrases(table, "old")) + "; END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_suggest_au AFTER UPDATE OF title, {column} ON {table} BEGIN "
+        + _SUGGEST_REMOVE.format(phrases=_suggest_phrases(table, "old")) + "; "
+        + _SUGGEST_ADD.format(phrases=_suggest_phrases(table, "new")) + "; END",
+    )
+]
+
+
+# Ingredient posting lists: one row per (term, recipe, ingredient position).
+# Each ingredient is indexed under its full normalized name and under each
+# of its words, so "chicken" finds "chicken thighs" while "soy sauce" only
+# finds soy sauce. Rows are written by the insert/update helpers (the
+# normalization lives in Python); deletes are handled by a trigger.
+
+_INGREDIENT_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS recipe_ingredients (
+        term TEXT NOT NULL,
+        recipe_id INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        PRIMARY KEY (term, recipe_id, position)
+    ) WITHOUT ROWID
+"""
+
+_INGREDIENT_TRIGGER = (
+    "CREATE TRIGGER IF NOT EXISTS recipe_ingredients_ad AFTER DELETE ON recipe_cards BEGIN "
+    "DELETE FROM recipe_ingredients WHERE recipe_id = old.id; END"
+)
+
+
+# Pre-serialized API documents. Each record's API JSON (the fields in
+# RECIPE_API_FIELDS / TIP_API_FIELDS, in that order) is built by SQLite's
+# json_object whenever the row is written, so API reads and exports send
+# the stored text without decoding and re-encoding the JSON columns. If the
+# document shape changes, update these and add a migration that calls
+# _fill_api_docs (or run scripts/rebuild_api_docs.py).
+
+_DOC_SCHEMAS = [
+    "CREATE TABLE IF NOT EXISTS recipe_docs (recipe_id INTEGER PRIMARY KEY, doc TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS tip_docs (tip_id INTEGER PRIMARY KEY, doc TEXT NOT NULL)",
+]
+
+_JSON_LIST = "CASE WHEN json_valid({col}) THEN json({col}) ELSE json('[]') END"
+
+_RECIPE_DOC_ROW = """
+    SELECT {row}.id, json_object(
+        'title', {row}.title,
+        'category', {row}.category,
+        'prep_time', {row}.prep_time,
+        'cook_time', {row}.cook_time,
+        'portion_count', {row}.portion_count,
+        'ingredients', """ + _JSON_LIST.format(col="{row}.ingredients") + """,
+        'directions', """ + _JSON_LIST.format(col="{row}.directions") + """,
+        'notes', {row}.notes,
+        'source_conversation', {row}.source_conversation,
+        'created_at', {row}.created_at,
+        'source_type', ifnull(nullif({row}.source_type, ''), 'ai'),
+        'highlight', json(CASE WHEN {row}.highlight THEN 'true' ELSE 'false' END)
+    )
+"""
+
+_TIP_DOC_ROW = """
+    SELECT {row}.id, json_object(
+        'title', {row}.title,
+        'category', {row}.category,
+        'items', """ + _JSON_LIST.format(col="{row}.items") + """,
+        'notes', {row}.notes,
+        'source_conversation', {row}.source_conversation,
+        'created_at', {row}.created_at,
+        'source_type', ifnull(nullif({row}.source_type, ''), 'ai'),
+        'highlight', json(CASE WHEN {row}.highlight THEN 'true' ELSE 'false' END)
+    )
+"""
+
+_RECIPE_DOC_COLUMNS = (
+    "title, category, prep_time, cook_time, portion_count, ingredients, directions, notes, "
+    "source_conversation, created_at, source_type, highlight"
+)
+_TIP_DOC_COLUMNS = "title, category, items, notes, source_conversation, created_at, source_type, highlight"
+
+_DOC_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS recipe_docs_ai AFTER INSERT ON recipe_cards BEGIN "
+    "INSERT OR REPLACE INTO recipe_docs (recipe_id, doc) " + _RECIPE_DOC_ROW.format(row="new") + "; END",
+    f"CREATE TRIGGER IF NOT EXISTS recipe_docs_au AFTER UPDATE OF {_RECIPE_DOC_COLUMNS} ON recipe_cards BEGIN "
+    "INSERT OR REPLACE INTO recipe_docs (recipe_id, doc) " + _RECIPE_DOC_ROW.format(row="new") + "; END",
+    "CREATE TRIGGER IF NOT EXISTS recipe_docs_ad AFTER DELETE ON recipe_cards BEGIN "
+    "DELETE FROM recipe_docs WHERE recipe_id = old.id; END",
+    "CREATE TRIGGER IF NOT EXISTS tip_docs_ai AFTER INSERT ON food_tips BEGIN "
+    "INSERT OR REPLACE INTO tip_docs (tip_id, doc) " + _TIP_DOC_ROW.format(row="new") + "; END",
+    f"CREATE TRIGGER IF NOT EXISTS tip_docs_au AFTER UPDATE OF {_TIP_DOC_COLUMNS} ON food_tips BEGIN "
+    "INSERT OR REPLACE INTO tip_docs (tip_id, doc) " + _TIP_DOC_ROW.format(row="new") + "; END",
+    "CREATE TRIGGER IF NOT EXISTS tip_docs_ad AFTER DELETE ON food_tips BEGIN "
+    "DELETE FROM tip_docs WHERE tip_id = old.id; END",
+]
+
+
 def _has_column(conn, table, column):
-    cols = conn.execute(f"PRAGMA table_info({table})").fetchall()
+    # table_xinfo also lists generated columns
+    cols = conn.execute(f"PRAGMA table_xinfo({table})").fetchall()
     return any(c["name"] == column for c in cols)
 
 
-def init_db():
-    conn = get_db()
+# Schema migrations. PRAGMA user_version records how many have been applied;
+# init_db applies the rest in order, each in its own transaction. Migrations
+# must be idempotent: databases created before the runner existed start at
+# user_version 0 with some of the schema already in place.
+
+def _migrate_base_tables(conn):
     conn.execute(_RECIPE_SCHEMA)
     conn.execute(_TIP_SCHEMA)
-    # Migrate existing tables
     for table in ("recipe_cards", "food_tips"):
         if not _has_column(conn, table, "created_at"):
             conn.execute(f"ALTER TABLE {table} ADD COLUMN created_at TEXT")
@@ -63,325 +688,1642 @@ def init_db():
             conn.execute(f"ALTER TABLE {table} ADD COLUMN source_type TEXT DEFAULT 'ai'")
         if not _has_column(conn, table, "highlight"):
             conn.execute(f"ALTER TABLE {table} ADD COLUMN highlight INTEGER DEFAULT 0")
+
+
+def _migrate_search_index(conn):
+    # Populated from existing rows the first time it is created
+    fts_missing = not conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'recipe_fts'"
+    ).fetchone()
+    conn.execute(_RECIPE_FTS_SCHEMA)
+    conn.execute(_TIP_FTS_SCHEMA)
+    for trigger in _FTS_TRIGGERS:
+        conn.execute(trigger)
+    if fts_missing:
+        _fill_search_index(conn)
+
+
+def _migrate_outbox(conn):
+    conn.execute(_OUTBOX_SCHEMA)
+
+
+def _migrate_data_version(conn):
+    conn.execute(_DATA_VERSION_SCHEMA)
+    conn.execute(
+        "INSERT OR IGNORE INTO data_version (id, version, modified_at) VALUES (1, 1, ?)", (_now(),)
+    )
+    for trigger in _DATA_VERSION_TRIGGERS:
+        conn.execute(trigger)
+
+
+def _migrate_indexes(conn):
+    for table in ("recipe_cards", "food_tips"):
+        # Category lists
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_category "
+            f"ON {table} (category, highlight DESC, title)"
+        )
+        # Unfiltered lists and highlight = 1 lookups
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_highlight ON {table} (highlight DESC, title)"
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_created_at ON {table} (created_at)")
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_conversation "
+            f"ON {table} (source_conversation, highlight DESC, title)"
+        )
+        # Keyset API pages: (category = ? AND id > ?) and (source_type = ? AND id > ?)
+        # walk these in rowid order without a sort
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_category_id ON {table} (category)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_source_type ON {table} (source_type)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_notification_outbox_due "
+        "ON notification_outbox (status, next_attempt_at)"
+    )
+
+
+def _migrate_counts(conn):
+    # Stored list lengths so list pages never fetch or decode the JSON blobs
+    for table, column in (
+        ("recipe_cards", "ingredient_count"),
+        ("recipe_cards", "step_count"),
+        ("food_tips", "item_count"),
+    ):
+        if not _has_column(conn, table, column):
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+    backfill_counts(conn)
+
+
+def backfill_counts(conn):
+    """Recompute the stored count columns from the JSON columns."""
+    conn.execute(
+        "UPDATE recipe_cards SET "
+        "ingredient_count = CASE WHEN json_valid(ingredients) THEN json_array_length(ingredients) ELSE 0 END, "
+        "step_count = CASE WHEN json_valid(directions) THEN json_array_length(directions) ELSE 0 END"
+    )
+    conn.execute(
+        "UPDATE food_tips SET "
+        "item_count = CASE WHEN json_valid(items) THEN json_array_length(items) ELSE 0 END"
+    )
+
+
+def _migrate_updated_at(conn):
+    # Microsecond last-edit stamp; keys the rendered detail page cache
+    for table in ("recipe_cards", "food_tips"):
+        if not _has_column(conn, table, "updated_at"):
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN updated_at TEXT")
+        conn.execute(f"UPDATE {table} SET updated_at = ifnull(created_at, ?) WHERE updated_at IS NULL", (_now(),))
+
+
+def _migrate_ingredient_index(conn):
+    conn.execute(_INGREDIENT_SCHEMA)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_recipe_ingredients_recipe ON recipe_ingredients (recipe_id)"
+    )
+    conn.execute(_INGREDIENT_TRIGGER)
+    _fill_ingredient_index(conn)
+
+
+def _migrate_api_docs(conn):
+    for schema in _DOC_SCHEMAS:
+        conn.execute(schema)
+    for trigger in _DOC_TRIGGERS:
+        conn.execute(trigger)
+    _fill_api_docs(conn)
+
+
+def _migrate_content_key(conn):
+    # Import dedupe: rows are matched on (title, category, source_conversation)
+    for table in ("recipe_cards", "food_tips"):
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_content_key "
+            f"ON {table} (title, category, source_conversation)"
+        )
+
+
+def _migrate_suggest_terms(conn):
+    for schema in _SUGGEST_SCHEMAS:
+        conn.execute(schema)
+    for trigger in _SUGGEST_TRIGGERS:
+        conn.execute(trigger)
+    _fill_suggest_terms(conn)
+
+
+def _migrate_category_counts(conn):
+    conn.execute(_CATEGORY_COUNTS_SCHEMA)
+    for trigger in _CATEGORY_TRIGGERS:
+        conn.execute(trigger)
+    _fill_category_counts(conn)
+
+
+def _migrate_recipe_facets(conn):
+    # Total time as a generated column; VIRTUAL because ALTER TABLE cannot
+    # add a STORED one, but the list indexes below store the computed value,
+    # so range filters on it never recompute it from the table row.
+    if not _has_column(conn, "recipe_cards", "total_time"):
+        conn.execute(
+            f"ALTER TABLE recipe_cards ADD COLUMN total_time INTEGER GENERATED ALWAYS AS ({_TOTAL_TIME}) VIRTUAL"
+        )
+    # Filtered list pages (see RECIPE_FACETS)
+    conn.execute("DROP INDEX IF EXISTS idx_recipe_cards_category")
+    conn.execute("DROP INDEX IF EXISTS idx_recipe_cards_highlight")
+    for name, columns in _FACET_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_recipe_cards_{name} ON recipe_cards ({columns})")
+    conn.execute(_FACET_COUNTS_SCHEMA)
+    for trigger in _FACET_TRIGGERS:
+        conn.execute(trigger)
+    _fill_recipe_facet_counts(conn)
+
+
+def _migrate_facet_missing_times(conn):
+    # Recipes without times used to land in the shortest time buckets:
+    # total_time was 0 and the prep/cook buckets started at 0. Redefine the
+    # column (its indexes and the count triggers depend on it) and recount.
+    for trigger in ("recipe_facets_ai", "recipe_facets_ad", "recipe_facets_au"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    table_sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'recipe_cards'").fetchone()[0]
+    if _TOTAL_TIME not in table_sql:
+        for name in _FACET_INDEXES:
+            conn.execute(f"DROP INDEX IF EXISTS idx_recipe_cards_{name}")
+        conn.execute("ALTER TABLE recipe_cards DROP COLUMN total_time")
+        _migrate_recipe_facets(conn)
+    else:
+        for trigger in _FACET_TRIGGERS:
+            conn.execute(trigger)
+        _fill_recipe_facet_counts(conn)
+
+
+MIGRATIONS = [
+    _migrate_base_tables,
+    _migrate_search_index,
+    _migrate_outbox,
+    _migrate_data_version,
+    _migrate_indexes,
+    _migrate_counts,
+    _migrate_updated_at,
+    _migrate_ingredient_index,
+    _migrate_api_docs,
+    _migrate_content_key,
+    _migrate_suggest_terms,
+    _migrate_category_counts,
+    _migrate_recipe_facets,
+    _migrate_facet_missing_times,
+]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def init_db():
+    conn = connect()
+    try:
+        if schema_version(conn) >= len(MIGRATIONS):
+            return
+        while True:
+            # Take the write lock before re-reading the version so concurrent
+            # workers starting up apply each migration exactly once.
+            conn.execute("BEGIN IMMEDIATE")
+            version = schema_version(conn)
+            if version >= len(MIGRATIONS):
+                conn.rollback()
+                return
+            try:
+                MIGRATIONS[version](conn)
+                conn.execute(f"PRAGMA user_version = {version + 1}")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+    finally:
+        conn.close()
+
+
+def _fill_search_index(conn):
+    conn.execute("DELETE FROM recipe_fts")
+    conn.execute("DELETE FROM tip_fts")
+    conn.execute(
+        "INSERT INTO recipe_fts (rowid, title, ingredients, directions, notes) "
+        + _RECIPE_FTS_ROW.format(row="recipe_cards") + " FROM recipe_cards"
+    )
+    conn.execute(
+        "INSERT INTO tip_fts (rowid, title, items, notes) "
+        + _TIP_FTS_ROW.format(row="food_tips") + " FROM food_tips"
+    )
+
+
+def rebuild_search_index():
+    conn = get_db()
+    _fill_search_index(conn)
+    conn.commit()
+
+
+def _fill_ingredient_index(conn):
+    conn.execute("DELETE FROM recipe_ingredients")
+    rows = conn.execute("SELECT id, ingredients FROM recipe_cards")
+    batch = []
+    for row in rows:
+        try:
+            ingredients = json.loads(row["ingredients"] or "[]")
+        except ValueError:
+            continue
+        batch.append((row["id"], ingredients))
+        if len(batch) == 1000:
+            _index_ingredients(conn, batch, replace=False)
+            batch = []
+    _index_ingredients(conn, batch, replace=False)
+
+
+def _fill_api_docs(conn):
+    conn.execute("DELETE FROM recipe_docs")
+    conn.execute("DELETE FROM tip_docs")
+    conn.execute(
+        "INSERT INTO recipe_docs (recipe_id, doc) "
+        + _RECIPE_DOC_ROW.format(row="recipe_cards") + " FROM recipe_cards"
+    )
+    conn.execute(
+        "INSERT INTO tip_docs (tip_id, doc) "
+        + _TIP_DOC_ROW.format(row="food_tips") + " FROM food_tips"
+    )
+
+
+def _fill_suggest_terms(conn):
+    conn.execute("DELETE FROM suggest_terms")
+    phrases = " UNION ALL ".join(
+        f"SELECT title AS phrase FROM {table} UNION ALL SELECT {_SUGGEST_NAME} FROM {table} r, "
+        f"json_each(CASE WHEN json_valid(r.{column}) THEN r.{column} ELSE '[]' END)"
+        for table, column in _SUGGEST_LISTS.items()
+    )
+    conn.execute(
+        "INSERT INTO suggest_terms (term, phrase, uses) "
+        f"SELECT lower(trim(phrase)), min(trim(phrase)), count(*) FROM ({phrases}) "
+        "WHERE trim(ifnull(phrase, '')) != '' GROUP BY lower(trim(phrase))"
+    )
+
+
+_CATEGORY_COUNTS_QUERY = " UNION ALL ".join(
+    f"SELECT '{kind}' AS kind, category, COUNT(*) AS count FROM {table} GROUP BY category"
+    for table, kind in _CATEGORY_KINDS.items()
+)
+
+
+def _fill_category_counts(conn):
+    conn.execute("DELETE FROM category_counts")
+    conn.execute(f"INSERT INTO category_counts (kind, category, count) {_CATEGORY_COUNTS_QUERY}")
+
+
+def check_category_counts():
+    """Differences between category_counts and a fresh GROUP BY.
+
+    Returns [(kind, category, stored count, actual count)]; a missing row
+    counts as 0. Empty when the table is consistent.
+    """
+    conn = get_db()
+    stored = {(r["kind"], r["category"]): r["count"] for r in conn.execute("SELECT * FROM category_counts")}
+    actual = {(r["kind"], r["category"]): r["count"] for r in conn.execute(_CATEGORY_COUNTS_QUERY)}
+    return [
+        (kind, category, stored.get((kind, category), 0), actual.get((kind, category), 0))
+        for kind, category in sorted(stored.keys() | actual.keys())
+        if stored.get((kind, category)) != actual.get((kind, category))
+    ]
+
+
+def rebuild_category_counts():
+    conn = get_db()
+    _fill_category_counts(conn)
+    conn.commit()
+
+
+_FACET_COUNTS_QUERY = (
+    f"SELECT {_facet_row('')}, COUNT(*) FROM recipe_cards "
+    f"GROUP BY {', '.join(str(i + 1) for i in range(len(RECIPE_FACETS)))}"
+)
+
+
+def _fill_recipe_facet_counts(conn):
+    conn.execute("DELETE FROM recipe_facet_counts")
+    conn.execute(f"INSERT INTO recipe_facet_counts ({_FACET_KEY}, count) {_FACET_COUNTS_QUERY}")
+
+
+def check_recipe_facet_counts():
+    """Differences between recipe_facet_counts and a fresh GROUP BY.
+
+    Returns [(facet values, stored count, actual count)]; empty when the
+    table is consistent.
+    """
+    conn = get_db()
+    stored = {tuple(r[:-1]): r[-1] for r in conn.execute(f"SELECT {_FACET_KEY}, count FROM recipe_facet_counts")}
+    actual = {tuple(r[:-1]): r[-1] for r in conn.execute(_FACET_COUNTS_QUERY)}
+    return [
+        (key, stored.get(key, 0), actual.get(key, 0))
+        for key in sorted(stored.keys() | actual.keys(), key=repr)
+        if stored.get(key) != actual.get(key)
+    ]
+
+
+def rebuild_recipe_facet_counts():
+    conn = get_db()
+    _fill_recipe_facet_counts(conn)
     conn.commit()
-    conn.close()
 
 
-# Query helpers
+def rebuild_suggest_terms():
+    conn = get_db()
+    _fill_suggest_terms(conn)
+    conn.commit()
+
+
+def rebuild_api_docs():
+    conn = get_db()
+    _fill_api_docs(conn)
+    conn.commit()
+
+
+def rebuild_ingredient_index():
+    conn = get_db()
+    _fill_ingredient_index(conn)
+    conn.commit()
+
+
+# Versioned cache
+
+CACHE_TTL = 60  # seconds; bounds staleness of time-based results like "recent"
+
+_cache = {}
+cache_stats = {"hits": 0, "misses": 0}
+
+
+def get_data_version():
+    """Return (version, modified_at) for the recipe and tip tables."""
+    row = get_db().execute("SELECT version, modified_at FROM data_version WHERE id = 1").fetchone()
+    return row["version"], row["modified_at"]
+
+
+def cached(fn):
+    """Memoize a read helper until the data version changes (or CACHE_TTL passes).
+
+    One entry per helper: the arguments are part of the freshness tag, not
+    the key, so a call with new arguments (the next hour's cutoff) replaces
+    the previous result instead of piling up beside it.
+    """
+    @wraps(fn)
+    def wrapper(*args):
+        tag = (get_data_version()[0], args)
+        hit = _cache.get(fn.__name__)
+        now = time.monotonic()
+        if hit and hit[0] == tag and now - hit[1] < CACHE_TTL:
+            cache_stats["hits"] += 1
+            return hit[2]
+        cache_stats["misses"] += 1
+        value = fn(*args)
+        _cache[fn.__name__] = (tag, now, value)
+        return value
+    return wrapper
+
+
+# Query helpers
+
+NEW_DAYS = 7
+
+
+def new_cutoff(days=NEW_DAYS):
+    """Oldest created_at that still counts as new.
+
+    Aligned to the top of the hour, so every query in the same hour agrees
+    on which rows are new and pages stay cacheable for that hour.
+    """
+    hour = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return (hour - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+LIST_PAGE_SIZE = 50
+
+_RECIPE_LIST_COLUMNS = (
+    "id, title, category, prep_time, cook_time, portion_count, source_type, highlight, created_at"
+)
+_TIP_LIST_COLUMNS = "id, title, category, item_count, source_type, highlight, created_at"
+
+
+def _list_page(table, columns, where, params, after, limit):
+    """Keyset page in list order (highlight DESC, title, id). Returns (rows, next_after).
+
+    `where`/`params` are the filter conditions (ANDed) and their values.
+    `after` is the (highlight, title, id) of the last row already shown.
+    Each page is an index range read, however deep into the list it is.
+    """
+    select = f"SELECT {columns}, created_at >= ? AS is_new FROM {table}"
+    scope = "".join(f"{condition} AND " for condition in where)
+    base = [new_cutoff()] + list(params)
+    if after:
+        highlight, title, row_id = after
+        # Rest of the cursor's highlight group, then the groups below it
+        sql = (
+            f"SELECT * FROM ({select} WHERE {scope}highlight = ? AND (title, id) > (?, ?) "
+            "ORDER BY title, id LIMIT ?) "
+            f"UNION ALL SELECT * FROM ({select} WHERE {scope}highlight < ? "
+            "ORDER BY highlight DESC, title, id LIMIT ?) "
+            "ORDER BY highlight DESC, title, id LIMIT ?"
+        )
+        params = base + [highlight, title, row_id, limit + 1] + base + [highlight, limit + 1, limit + 1]
+    else:
+        sql = select + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY highlight DESC, title, id LIMIT ?"
+        params = base + [limit + 1]
+    # Fetch one extra row to learn whether another page follows
+    rows = get_db().execute(sql, params).fetchall()
+    next_after = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_after = (last["highlight"], last["title"], last["id"])
+    return rows[:limit], next_after
+
+
+def _bucket(buckets, key):
+    for bucket in buckets:
+        if bucket[0] == key:
+            return bucket
+    return None
+
+
+def _facet_conditions(filters):
+    """(conditions, params) for a {facet: value or bucket key} filter dict."""
+    where, params = [], []
+    for name, value in filters.items():
+        expr, buckets = RECIPE_FACETS[name]
+        expr = expr.format(row="")
+        if buckets is None:
+            where.append(f"{expr} = ?")
+            params.append(value)
+            continue
+        _, _, low, high = _bucket(buckets, value)
+        if high is None:
+            where.append(f"{expr} >= ?")
+            params.append(low)
+        else:
+            where.append(f"{expr} BETWEEN ? AND ?")
+            params.extend((low, high))
+    return where, params
+
+
+# One row per facet for the facet counts query to fan each combination out to
+_FACET_NAMES = " UNION ALL ".join(f"SELECT '{name}' AS facet" for name in RECIPE_FACETS)
+_FACET_PICK = "CASE facet " + " ".join(f"WHEN '{name}' THEN {name}" for name in RECIPE_FACETS) + " END"
+
+
+def _recipe_facet_counts(filter_items):
+    # Each active filter applies to every facet's counts but its own
+    where = " AND ".join(f"(facet = '{name}' OR {name} = ?)" for name, _ in filter_items)
+    rows = get_db().execute(
+        f"SELECT facet, {_FACET_PICK} AS value, SUM(count) FROM recipe_facet_counts, ({_FACET_NAMES}) "
+        f"WHERE {where or 1} GROUP BY 1, 2",
+        [value for _, value in filter_items],
+    ).fetchall()
+    counts = {name: {} for name in RECIPE_FACETS}
+    for facet, value, count in rows:
+        if value != "":
+            counts[facet][value] = count
+    return counts
+
+
+def get_recipe_facets(filters):
+    """Recipe counts per facet value: {facet: {value or bucket key: count}}.
+
+    Each facet is counted with every filter but its own applied, so its
+    counts show what choosing another value would give. All of them come
+    from one grouped query over recipe_facet_counts, kept in cache.facets
+    (LRU-bounded) per filter set until the data changes.
+    """
+    key, version = tuple(sorted(filters.items())), get_data_version()[0]
+    counts = cache.facets.get(key, version)
+    if counts is None:
+        counts = _recipe_facet_counts(key)
+        cache.facets.set(key, version, counts, nbytes=len(repr(counts)))
+    return counts
+
+
+def _filtered_count(filters):
+    """Recipes matching every filter, from the cached facet counts."""
+    name, value = next(iter(filters.items()))
+    return get_recipe_facets(filters)[name].get(value, 0)
 
-def get_recipes(category=None):
-    conn = get_db()
-    if category:
-        rows = conn.execute(
-            "SELECT id, title, category, prep_time, cook_time, portion_count, source_type, highlight, created_at "
-            "FROM recipe_cards WHERE category = ? ORDER BY highlight DESC, title",
-            (category,),
-        ).fetchall()
-    else:
-        rows = conn.execute(
-            "SELECT id, title, category, prep_time, cook_time, portion_count, source_type, highlight, created_at "
-            "FROM recipe_cards ORDER BY highlight DESC, title"
-        ).fetchall()
-    conn.close()
-    return rows
+
+def get_recipes(filters=None, after=None, limit=LIST_PAGE_SIZE):
+    """One page of the recipe list, narrowed by `filters` ({facet: value}, see
+    RECIPE_FACETS). Returns (rows, next_after); see _list_page."""
+    filters = filters or {}
+    if filters and not _filtered_count(filters):
+        # Known empty: skip a scan that would read the whole index
+        return [], None
+    where, params = _facet_conditions(filters)
+    return _list_page("recipe_cards", _RECIPE_LIST_COLUMNS, where, params, after, limit)
 
 
 def get_recipe(recipe_id):
     conn = get_db()
     row = conn.execute(
-        "SELECT * FROM recipe_cards WHERE id = ?", (recipe_id,)
+        "SELECT *, created_at >= ? AS is_new FROM recipe_cards WHERE id = ?", (new_cutoff(), recipe_id)
     ).fetchone()
-    conn.close()
     return row
 
 
-def get_tips(category=None):
-    conn = get_db()
-    if category:
-        rows = conn.execute(
-            "SELECT id, title, category, items, source_type, highlight, created_at FROM food_tips "
-            "WHERE category = ? ORDER BY highlight DESC, title",
-            (category,),
-        ).fetchall()
-    else:
-        rows = conn.execute(
-            "SELECT id, title, category, items, source_type, highlight, created_at FROM food_tips "
-            "ORDER BY highlight DESC, title"
-        ).fetchall()
-    conn.close()
-    return rows
+def get_recipe_header(recipe_id):
+    """The few columns a detail page needs around its cached body."""
+    return get_db().execute(
+        "SELECT id, title, category, source_conversation, updated_at, created_at >= ? AS is_new "
+        "FROM recipe_cards WHERE id = ?",
+        (new_cutoff(), recipe_id),
+    ).fetchone()
+
+
+def get_tips(category=None, after=None, limit=LIST_PAGE_SIZE):
+    """One page of the tip list. Returns (rows, next_after); see _list_page."""
+    where, params = (["category = ?"], [category]) if category else ([], [])
+    return _list_page("food_tips", _TIP_LIST_COLUMNS, where, params, after, limit)
 
 
 def get_tip(tip_id):
     conn = get_db()
     row = conn.execute(
-        "SELECT * FROM food_tips WHERE id = ?", (tip_id,)
+        "SELECT *, created_at >= ? AS is_new FROM food_tips WHERE id = ?", (new_cutoff(), tip_id)
     ).fetchone()
-    conn.close()
     return row
 
 
+def get_tip_header(tip_id):
+    """The few columns a detail page needs around its cached body."""
+    return get_db().execute(
+        "SELECT id, title, category, source_conversation, updated_at, created_at >= ? AS is_new "
+        "FROM food_tips WHERE id = ?",
+        (new_cutoff(), tip_id),
+    ).fetchone()
+
+
 def get_recipe_categories():
     conn = get_db()
     rows = conn.execute(
-        "SELECT category, COUNT(*) as count FROM recipe_cards "
-        "GROUP BY category ORDER BY category"
+        "SELECT category, count FROM category_counts WHERE kind = 'recipe' ORDER BY category"
     ).fetchall()
-    conn.close()
     return rows
 
 
 def get_tip_categories():
     conn = get_db()
     rows = conn.execute(
-        "SELECT category, COUNT(*) as count FROM food_tips "
-        "GROUP BY category ORDER BY category"
+        "SELECT category, count FROM category_counts WHERE kind = 'tip' ORDER BY category"
     ).fetchall()
-    conn.close()
     return rows
 
 
 def get_highlighted_recipes():
     conn = get_db()
     rows = conn.execute(
-        "SELECT id, title, category, created_at FROM recipe_cards "
-        "WHERE highlight = 1 ORDER BY title"
+        "SELECT id, title, category, created_at, created_at >= ? AS is_new FROM recipe_cards "
+        "WHERE highlight = 1 ORDER BY title",
+        (new_cutoff(),),
     ).fetchall()
-    conn.close()
     return rows
 
 
 def get_highlighted_tips():
     conn = get_db()
     rows = conn.execute(
-        "SELECT id, title, category, created_at FROM food_tips "
-        "WHERE highlight = 1 ORDER BY title"
+        "SELECT id, title, category, created_at, created_at >= ? AS is_new FROM food_tips "
+        "WHERE highlight = 1 ORDER BY title",
+        (new_cutoff(),),
     ).fetchall()
-    conn.close()
     return rows
 
 
-def get_recent_recipes(days=7):
+def get_recent_recipes(days=NEW_DAYS):
     conn = get_db()
-    cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+    cutoff = new_cutoff(days)
     rows = conn.execute(
         "SELECT id, title, category, created_at FROM recipe_cards "
         "WHERE created_at >= ? ORDER BY created_at DESC",
         (cutoff,),
     ).fetchall()
-    conn.close()
     return rows
 
 
-def get_recent_tips(days=7):
+def get_recent_tips(days=NEW_DAYS):
     conn = get_db()
-    cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+    cutoff = new_cutoff(days)
     rows = conn.execute(
         "SELECT id, title, category, created_at FROM food_tips "
         "WHERE created_at >= ? ORDER BY created_at DESC",
         (cutoff,),
     ).fetchall()
-    conn.close()
     return rows
 
 
 def get_by_conversation(source_conversation):
     conn = get_db()
+    cutoff = new_cutoff()
     recipes = conn.execute(
-        "SELECT id, title, category, prep_time, cook_time, portion_count, source_type, highlight, created_at "
+        "SELECT id, title, category, prep_time, cook_time, portion_count, source_type, highlight, created_at, "
+        "created_at >= ? AS is_new "
         "FROM recipe_cards WHERE source_conversation = ? ORDER BY highlight DESC, title",
-        (source_conversation,),
+        (cutoff, source_conversation),
     ).fetchall()
     tips = conn.execute(
-        "SELECT id, title, category, items, source_type, highlight, created_at "
+        "SELECT id, title, category, item_count, source_type, highlight, created_at, "
+        "created_at >= ? AS is_new "
         "FROM food_tips WHERE source_conversation = ? ORDER BY highlight DESC, title",
-        (source_conversation,),
+        (cutoff, source_conversation),
     ).fetchall()
-    conn.close()
     return recipes, tips
 
 
 def get_counts():
     conn = get_db()
-    recipe_count = conn.execute("SELECT COUNT(*) FROM recipe_cards").fetchone()[0]
-    tip_count = conn.execute("SELECT COUNT(*) FROM food_tips").fetchone()[0]
-    conn.close()
-    return recipe_count, tip_count
+    totals = dict(conn.execute("SELECT kind, SUM(count) FROM category_counts GROUP BY kind").fetchall())
+    return totals.get("recipe", 0), totals.get("tip", 0)
+
+
+def get_home_data():
+    """Everything the home page shows, cached as one unit per "new" window."""
+    return _home_data(new_cutoff())
+
+
+@cached
+def _home_data(cutoff):
+    recipe_count, tip_count = get_counts()
+    return {
+        "recipe_count": recipe_count,
+        "tip_count": tip_count,
+        "recipe_categories": get_recipe_categories(),
+        "tip_categories": get_tip_categories(),
+        "highlighted_recipes": get_highlighted_recipes(),
+        "highlighted_tips": get_highlighted_tips(),
+        "recent_recipes": get_recent_recipes(),
+        "recent_tips": get_recent_tips(),
+    }
+
+
+# Single-writer queue. Record writes from every request thread are handed
+# to one writer thread per process, which runs whatever has queued up in a
+# single transaction (each write in its own savepoint, so one failing write
+# does not take the others down) and pays for one commit per group instead
+# of one per record. The bounded queue is the backpressure: when it is full
+# write() raises WriteQueueFull and the app answers 503; background writers
+# (bulk import, the notification worker, scripts) pass block=True and wait
+# for room instead.
+#
+# Every data write goes through write(). The exceptions are schema work
+# (init_db's migrations) and the rebuild_* maintenance helpers, which run
+# at startup or from scripts. Another process (a second gunicorn worker, a
+# script) can still hold the lock, so the writer retries BEGIN IMMEDIATE
+# up to WRITE_LOCK_RETRIES times, each after a full busy timeout.
+
+WRITE_LOCK_RETRIES = 3
+
+
+class WriteQueueFull(Exception):
+    pass
+
+
+write_stats = {"writes": 0, "commits": 0, "rejected": 0}
+
+
+class _Writer:
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self.pid = os.getpid()
+        self.thread = threading.Thread(target=self.run, name="db-writer", daemon=True)
+        self.thread.start()
+
+    def _take(self):
+        """Block for one queued write, then gather more for up to WRITE_GROUP_MS."""
+        group = [self.queue.get()]
+        deadline = time.monotonic() + WRITE_GROUP_MS / 1000
+        while len(group) < WRITE_GROUP_MAX:
+            remaining = deadline - time.monotonic()
+            try:
+                group.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return group
+
+    def run(self):
+        while True:
+            group = self._take()
+            try:
+                results = self._commit(_thread_connection(), group)
+            except Exception as e:
+                log.exception("Write group of %d failed", len(group))
+                for _, _, future in group:
+                    future.set_exception(e)
+                continue
+            # Callers only hear back once their write is durable
+            for future, result, error in results:
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+
+    def _begin(self, conn):
+        for attempt in range(WRITE_LOCK_RETRIES + 1):
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                return
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e) or attempt == WRITE_LOCK_RETRIES:
+                    raise
+                log.warning("Database locked by another writer; retrying (%d/%d)", attempt + 1, WRITE_LOCK_RETRIES)
+
+    def _commit(self, conn, group):
+        results = []
+        self._begin(conn)
+        try:
+            for fn, args, future in group:
+                conn.execute("SAVEPOINT write")
+                try:
+                    result = fn(conn, *args)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write")
+                    results.append((future, None, e))
+                else:
+                    results.append((future, result, None))
+                conn.execute("RELEASE write")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        write_stats["writes"] += len(group)
+        write_stats["commits"] += 1
+        return results
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer():
+    global _writer
+    with _writer_lock:
+        # A writer inherited across fork has no thread behind it
+        if _writer is None or _writer.pid != os.getpid():
+            _writer = _Writer()
+    return _writer
+
+
+def write(fn, *args, block=False):
+    """Run fn(conn, *args) in a write transaction and return its result.
+
+    With DB_WRITER=thread (the default) the call is queued for this
+    process's writer thread and the caller waits for the group it lands in
+    to commit; raises WriteQueueFull if WRITE_QUEUE_SIZE writes are already
+    waiting, unless `block` is set, in which case it waits for room. With
+    DB_WRITER=off it runs and commits on the caller's connection. `fn` must
+    not commit.
+    """
+    if DB_WRITER == "off":
+        conn = get_db()
+        try:
+            result = fn(conn, *args)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return result
+    future = Future()
+    try:
+        _get_writer().queue.put((fn, args, future), block=block)
+    except queue.Full:
+        write_stats["rejected"] += 1
+        raise WriteQueueFull(f"{WRITE_QUEUE_SIZE} writes already queued") from None
+    # The statements run on the writer thread; count the wait as SQL time
+    with metrics.phase("db"):
+        return future.result()
 
 
 def _now():
     return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
 
 
-def insert_recipe(data):
-    conn = get_db()
-    conn.execute(
-        "INSERT INTO recipe_cards (title, category, prep_time, cook_time, "
-        "portion_count, ingredients, directions, notes, source_conversation, "
-        "created_at, source_type, highlight) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-        (
-            data["title"],
-            data["category"],
-            data.get("prep_time", 0),
-            data.get("cook_time", 0),
-            data.get("portion_count", ""),
-            json.dumps(data.get("ingredients", [])),
-            json.dumps(data.get("directions", [])),
-            data.get("notes", ""),
-            data.get("source_conversation"),
-            data.get("created_at") or _now(),
-            data.get("source_type", "ai"),
-            1 if data.get("highlight") else 0,
-        ),
+def _updated_now():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+# Field types accepted from uploads and imports. Strings and lists may be
+# null (a null list is stored as []); times may be numbers or strings.
+_STRING_FIELDS = {
+    "recipe": ("portion_count", "notes", "source_conversation", "created_at", "source_type"),
+    "tip": ("notes", "source_conversation", "created_at", "source_type"),
+}
+_LIST_FIELDS = {"recipe": ("ingredients", "directions"), "tip": ("items",)}
+_TIME_FIELDS = {"recipe": ("prep_time", "cook_time"), "tip": ()}
+
+
+def record_error(kind, data):
+    """Why `data` cannot be stored as a `kind` ("recipe" | "tip") record, or None.
+
+    Checks field types only; required fields are the caller's business.
+    """
+    for field in ("title", "category"):
+        if field in data and not isinstance(data[field], str):
+            return f"{field} must be a string"
+    for field in _STRING_FIELDS[kind]:
+        if data.get(field) is not None and not isinstance(data[field], str):
+            return f"{field} must be a string or null"
+    for field in _LIST_FIELDS[kind]:
+        if data.get(field) is not None and not isinstance(data[field], list):
+            return f"{field} must be a list or null"
+    for field in _TIME_FIELDS[kind]:
+        if isinstance(data.get(field), (dict, list)):
+            return f"{field} must be a number"
+    return None
+
+
+# Column order of _recipe_params / _tip_params
+_RECIPE_COLUMNS = (
+    "title, category, prep_time, cook_time, portion_count, ingredients, directions, notes, "
+    "source_conversation, created_at, source_type, highlight, ingredient_count, step_count, updated_at"
+)
+_TIP_COLUMNS = (
+    "title, category, items, notes, source_conversation, "
+    "created_at, source_type, highlight, item_count, updated_at"
+)
+
+_INSERT_RECIPE = (
+    f"INSERT INTO recipe_cards ({_RECIPE_COLUMNS}) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+_INSERT_TIP = f"INSERT INTO food_tips ({_TIP_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+
+def _list_field(data, field):
+    """data[field] as a list: missing or null gives [], any other non-list is a ValueError.
+
+    record_error rejects the latter up front; this keeps the stored JSON
+    and the stored counts agreeing whatever the caller passed.
+    """
+    value = data.get(field)
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        raise ValueError(f"{field} must be a list or null")
+    return value
+
+
+def _recipe_params(data):
+    return (
+        data["title"],
+        data["category"],
+        data.get("prep_time", 0),
+        data.get("cook_time", 0),
+        data.get("portion_count", ""),
+        json.dumps(_list_field(data, "ingredients")),
+        json.dumps(_list_field(data, "directions")),
+        data.get("notes", ""),
+        data.get("source_conversation"),
+        data.get("created_at") or _now(),
+        data.get("source_type", "ai"),
+        1 if data.get("highlight") else 0,
+        len(_list_field(data, "ingredients")),
+        len(_list_field(data, "directions")),
+        _updated_now(),
+    )
+
+
+def _tip_params(data):
+    return (
+        data["title"],
+        data["category"],
+        json.dumps(_list_field(data, "items")),
+        data.get("notes", ""),
+        data.get("source_conversation"),
+        data.get("created_at") or _now(),
+        data.get("source_type", "ai"),
+        1 if data.get("highlight") else 0,
+        len(_list_field(data, "items")),
+        _updated_now(),
     )
+
+
+def _recipe_event(data, row_id):
+    return {
+        "kind": "recipe",
+        "id": row_id,
+        "title": data["title"],
+        "category": data["category"],
+        "cook_time": data.get("cook_time"),
+        "portion_count": data.get("portion_count"),
+        "ingredient_count": len(_list_field(data, "ingredients")),
+    }
+
+
+def _tip_event(data, row_id):
+    return {
+        "kind": "tip",
+        "id": row_id,
+        "title": data["title"],
+        "category": data["category"],
+        "item_count": len(_list_field(data, "items")),
+    }
+
+
+def _insert_recipe(conn, data, notify):
+    conn.execute(_INSERT_RECIPE, _recipe_params(data))
     row_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
-    conn.commit()
-    conn.close()
+    _index_ingredients(conn, [(row_id, _list_field(data, "ingredients"))], replace=False)
+    if notify:
+        _enqueue_notification(conn, _recipe_event(data, row_id))
     return row_id
 
 
-def insert_tip(data):
-    conn = get_db()
-    conn.execute(
-        "INSERT INTO food_tips (title, category, items, notes, source_conversation, "
-        "created_at, source_type, highlight) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-        (
-            data["title"],
-            data["category"],
-            json.dumps(data.get("items", [])),
-            data.get("notes", ""),
-            data.get("source_conversation"),
-            data.get("created_at") or _now(),
-            data.get("source_type", "ai"),
-            1 if data.get("highlight") else 0,
-        ),
-    )
+def insert_recipe(data, notify=False):
+    return write(_insert_recipe, data, notify)
+
+
+def _insert_tip(conn, data, notify):
+    conn.execute(_INSERT_TIP, _tip_params(data))
     row_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
-    conn.commit()
-    conn.close()
+    if notify:
+        _enqueue_notification(conn, _tip_event(data, row_id))
     return row_id
 
 
-def update_recipe(recipe_id, data):
-    conn = get_db()
+def insert_tip(data, notify=False):
+    return write(_insert_tip, data, notify)
+
+
+def _insert_many(conn, sql, params):
+    if not params:
+        return []
+    conn.executemany(sql, params)
+    # The write lock is held for the whole statement, so AUTOINCREMENT hands
+    # out consecutive ids; last_insert_rowid() is the id of the final row
+    # (inserts made by the search-index triggers do not change it).
+    last = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+    return list(range(last - len(params) + 1, last + 1))
+
+
+def _insert_records(conn, recipes, tips, notify):
+    recipe_ids = _insert_many(conn, _INSERT_RECIPE, [_recipe_params(d) for d in recipes])
+    _index_ingredients(
+        conn, [(i, _list_field(d, "ingredients")) for d, i in zip(recipes, recipe_ids)], replace=False,
+    )
+    tip_ids = _insert_many(conn, _INSERT_TIP, [_tip_params(d) for d in tips])
+    if notify and (recipe_ids or tip_ids):
+        _enqueue_notification(conn, {
+            "kind": "batch",
+            "recipes": [_recipe_event(d, i) for d, i in zip(recipes, recipe_ids)],
+            "tips": [_tip_event(d, i) for d, i in zip(tips, tip_ids)],
+        })
+    return recipe_ids, tip_ids
+
+
+def insert_many(recipes, tips, notify=False):
+    """Insert lists of recipe and tip dicts in one transaction.
+
+    Returns (recipe_ids, tip_ids) in input order. With notify, a single
+    batch notification covering every row is queued.
+    """
+    return write(_insert_records, recipes, tips, notify)
+
+
+# Bulk import
+
+IMPORT_BATCH = 5000  # records per transaction
+
+# kind -> (table, columns, params builder, columns compared to detect a change)
+_IMPORT_KINDS = {
+    "recipe": ("recipe_cards", _RECIPE_COLUMNS, _recipe_params, _RECIPE_DOC_COLUMNS),
+    "tip": ("food_tips", _TIP_COLUMNS, _tip_params, _TIP_DOC_COLUMNS),
+}
+
+
+def _import_kind(kind, record):
+    """"recipe" | "tip" for a valid import record, else None."""
+    if not isinstance(record, dict):
+        return None
+    if kind is None:
+        kind = "tip" if "items" in record else "recipe"
+    if kind not in _IMPORT_KINDS:
+        return None
+    if not all(isinstance(record.get(f), str) and record[f] for f in ("title", "category")):
+        return None
+    # A dict or list in a scalar column would abort the import mid-batch
+    if record_error(kind, record) is not None:
+        return None
+    return kind
+
+
+def _import_staging(conn, table, columns):
+    staging = f"import_{table}"
+    conn.execute(
+        f"CREATE TEMP TABLE IF NOT EXISTS {staging} "
+        f"(seq INTEGER PRIMARY KEY, target_id INTEGER, changed INTEGER NOT NULL DEFAULT 0, {columns})"
+    )
+    return staging
+
+
+def _import_batch(conn, kind, records):
+    """Upsert {content key: record} for one kind. Returns (inserted, updated, unchanged).
+
+    Rows are staged in a temp table and merged with set-based statements,
+    so the per-row work stays inside SQLite. Existing rows whose exported
+    columns already match are left alone (no trigger work, no new
+    updated_at).
+    """
+    table, columns, params, compared = _IMPORT_KINDS[kind]
+    staging = _import_staging(conn, table, columns)
+    names = [c.strip() for c in columns.split(",")]
+    records = list(records.values())
+
+    conn.execute(f"DELETE FROM {staging}")
+    conn.executemany(
+        f"INSERT INTO {staging} (seq, {columns}) VALUES (?, {', '.join('?' * len(names))})",
+        [(seq, *params(r)) for seq, r in enumerate(records)],
+    )
+    conn.execute(
+        f"UPDATE {staging} SET target_id = ("
+        f"SELECT t.id FROM {table} t WHERE t.title = {staging}.title "
+        f"AND t.category = {staging}.category "
+        f"AND t.source_conversation IS {staging}.source_conversation ORDER BY t.id LIMIT 1)"
+    )
+    differs = " OR ".join(f"t.{c} IS NOT {staging}.{c}" for c in (c.strip() for c in compared.split(",")))
+    conn.execute(
+        f"UPDATE {staging} SET changed = 1 WHERE target_id IS NOT NULL AND EXISTS ("
+        f"SELECT 1 FROM {table} t WHERE t.id = {staging}.target_id AND ({differs}))"
+    )
+    updated = conn.execute(
+        f"UPDATE {table} SET {', '.join(f'{c} = s.{c}' for c in names)} "
+        f"FROM {staging} s WHERE {table}.id = s.target_id AND s.changed"
+    ).rowcount
+
+    new = [seq for (seq,) in conn.execute(f"SELECT seq FROM {staging} WHERE target_id IS NULL ORDER BY seq")]
+    new_ids = []
+    if new:
+        conn.execute(
+            f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging} "
+            "WHERE target_id IS NULL ORDER BY seq"
+        )
+        # Consecutive ids, as in _insert_many
+        last = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        new_ids = list(range(last - len(new) + 1, last + 1))
+
+    if kind == "recipe":
+        touched = [
+            (target_id, _list_field(records[seq], "ingredients"))
+            for seq, target_id in conn.execute(f"SELECT seq, target_id FROM {staging} WHERE changed")
+        ]
+        _index_ingredients(conn, touched)
+        _index_ingredients(
+            conn, [(i, _list_field(records[seq], "ingredients")) for seq, i in zip(new, new_ids)], replace=False,
+        )
+    return len(new), updated, len(records) - len(new) - updated
+
+
+def _import_batches(conn, batches):
+    return {kind: _import_batch(conn, kind, batch) for kind, batch in batches.items()}
+
+
+def import_records(records, batch_size=IMPORT_BATCH, progress=None):
+    """Upsert an iterable of ("recipe" | "tip" | None, record) pairs.
+
+    Records are matched to existing rows on (title, category,
+    source_conversation); a match is updated in place, anything else is
+    inserted. A kind of None is detected from the fields. Work is committed
+    every `batch_size` records, and `progress(stats)` is called after each
+    commit, so memory use does not grow with the input.
+
+    Returns {"recipe": {"inserted", "updated", "unchanged"}, "tip": {...},
+    "skipped": n, "error": message or None}. A ValueError raised while
+    reading `records` (malformed input) stops the import after committing
+    what was read before it and is reported as "error".
+    """
+    stats = {
+        kind: {"inserted": 0, "updated": 0, "unchanged": 0} for kind in _IMPORT_KINDS
+    }
+    stats.update(skipped=0, error=None)
+    pending = {kind: {} for kind in _IMPORT_KINDS}
+    count = 0
+
+    def flush():
+        # One writer job per batch; waits for queue room rather than failing
+        batches = {kind: dict(batch) for kind, batch in pending.items() if batch}
+        for kind, counts in write(_import_batches, batches, block=True).items():
+            for name, n in zip(("inserted", "updated", "unchanged"), counts):
+                stats[kind][name] += n
+        for batch in pending.values():
+            batch.clear()
+        if progress:
+            progress(stats)
+
+    records = iter(records)
+    while True:
+        try:
+            kind, record = next(records)
+        except StopIteration:
+            break
+        except ValueError as e:
+            stats["error"] = str(e)
+            break
+        kind = _import_kind(kind, record)
+        if kind is None:
+            stats["skipped"] += 1
+            continue
+        # Within a batch the last record for a key wins; across batches the
+        # later one updates the row the earlier one wrote
+        key = (record["title"], record["category"], record.get("source_conversation"))
+        pending[kind][key] = record
+        count += 1
+        if count % batch_size == 0:
+            flush()
+    if any(pending.values()):
+        flush()
+    return stats
+
+
+# Notification outbox
+
+def _enqueue_notification(conn, event):
+    now = _now()
+    conn.execute(
+        "INSERT INTO notification_outbox (event, created_at, next_attempt_at) VALUES (?, ?, ?)",
+        (json.dumps(event), now, now),
+    )
+
+
+def _timestamp(seconds_from_now):
+    return (datetime.now(timezone.utc) + timedelta(seconds=seconds_from_now)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _claim_notifications(conn, limit, lease_seconds):
+    now = _now()
+    return conn.execute(
+        "UPDATE notification_outbox SET locked_until = ? WHERE id IN ("
+        "SELECT id FROM notification_outbox WHERE status = 'pending' AND next_attempt_at <= ? "
+        "AND (locked_until IS NULL OR locked_until <= ?) ORDER BY id LIMIT ?) "
+        "RETURNING id, event, attempts",
+        (_timestamp(lease_seconds), now, now, limit),
+    ).fetchall()
+
+
+def claim_notifications(limit, lease_seconds):
+    """Lease up to `limit` due notifications to the calling worker.
+
+    The lease makes the claim safe across threads and gunicorn workers; a
+    worker that dies mid-delivery releases its rows when the lease expires.
+    Returns a list of (id, event, attempts).
+    """
+    rows = write(_claim_notifications, limit, lease_seconds, block=True)
+    rows.sort(key=lambda r: r["id"])
+    return [(r["id"], json.loads(r["event"]), r["attempts"]) for r in rows]
+
+
+def _complete_notifications(conn, ids):
+    conn.executemany("DELETE FROM notification_outbox WHERE id = ?", [(i,) for i in ids])
+
+
+def complete_notifications(ids):
+    write(_complete_notifications, ids, block=True)
+
+
+def _retry_notifications(conn, ids, error, delay_seconds, max_attempts):
+    conn.executemany(
+        "UPDATE notification_outbox SET attempts = attempts + 1, last_error = ?, "
+        "locked_until = NULL, next_attempt_at = ?, "
+        "status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END WHERE id = ?",
+        [(error, _timestamp(delay_seconds), max_attempts, i) for i in ids],
+    )
+
+
+def retry_notifications(ids, error, delay_seconds, max_attempts):
+    """Reschedule after a failed delivery; rows past max_attempts are marked failed."""
+    write(_retry_notifications, ids, error, delay_seconds, max_attempts, block=True)
+
+
+def _update_recipe(conn, recipe_id, data):
     conn.execute(
         "UPDATE recipe_cards SET title=?, category=?, prep_time=?, cook_time=?, "
         "portion_count=?, ingredients=?, directions=?, notes=?, source_type=?, "
-        "source_conversation=?, highlight=? WHERE id=?",
+        "source_conversation=?, highlight=?, ingredient_count=?, step_count=?, updated_at=? WHERE id=?",
         (
             data["title"],
             data["category"],
             data.get("prep_time", 0),
             data.get("cook_time", 0),
             data.get("portion_count", ""),
-            json.dumps(data.get("ingredients", [])),
-            json.dumps(data.get("directions", [])),
+            json.dumps(_list_field(data, "ingredients")),
+            json.dumps(_list_field(data, "directions")),
             data.get("notes", ""),
             data.get("source_type", "ai"),
             data.get("source_conversation", ""),
             data.get("highlight", 0),
+            len(_list_field(data, "ingredients")),
+            len(_list_field(data, "directions")),
+            _updated_now(),
             recipe_id,
         ),
     )
-    conn.commit()
-    conn.close()
+    _index_ingredients(conn, [(recipe_id, _list_field(data, "ingredients"))])
 
 
-def update_tip(tip_id, data):
-    conn = get_db()
+def update_recipe(recipe_id, data):
+    write(_update_recipe, recipe_id, data)
+    cache.pages.discard(("recipe", recipe_id))
+
+
+def _update_tip(conn, tip_id, data):
     conn.execute(
         "UPDATE food_tips SET title=?, category=?, items=?, notes=?, source_type=?, "
-        "source_conversation=?, highlight=? WHERE id=?",
+        "source_conversation=?, highlight=?, item_count=?, updated_at=? WHERE id=?",
         (
             data["title"],
             data["category"],
-            json.dumps(data.get("items", [])),
+            json.dumps(_list_field(data, "items")),
             data.get("notes", ""),
             data.get("source_type", "ai"),
             data.get("source_conversation", ""),
             data.get("highlight", 0),
+            len(_list_field(data, "items")),
+            _updated_now(),
             tip_id,
         ),
     )
-    conn.commit()
-    conn.close()
+
+
+def update_tip(tip_id, data):
+    write(_update_tip, tip_id, data)
+    cache.pages.discard(("tip", tip_id))
+
+
+def _delete(conn, table, row_id):
+    conn.execute(f"DELETE FROM {table} WHERE id=?", (row_id,))
 
 
 def delete_recipe(recipe_id):
-    conn = get_db()
-    conn.execute("DELETE FROM recipe_cards WHERE id=?", (recipe_id,))
-    conn.commit()
-    conn.close()
+    write(_delete, "recipe_cards", recipe_id)
+    cache.pages.discard(("recipe", recipe_id))
 
 
 def delete_tip(tip_id):
-    conn = get_db()
-    conn.execute("DELETE FROM food_tips WHERE id=?", (tip_id,))
-    conn.commit()
-    conn.close()
+    write(_delete, "food_tips", tip_id)
+    cache.pages.discard(("tip", tip_id))
+
+
+# Fields exposed by the API, in output order
+RECIPE_API_FIELDS = (
+    "title", "category", "prep_time", "cook_time", "portion_count", "ingredients",
+    "directions", "notes", "source_conversation", "created_at", "source_type", "highlight",
+)
+TIP_API_FIELDS = (
+    "title", "category", "items", "notes", "source_conversation", "created_at",
+    "source_type", "highlight",
+)
+
+# Stored counts clients can ask for instead of the full lists (?fields=)
+RECIPE_COUNT_FIELDS = ("ingredient_count", "step_count")
+TIP_COUNT_FIELDS = ("item_count",)
+
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+
+
+def _api_page(table, fields, after, limit, category, source_type, join=""):
+    columns = ", ".join(("id",) + tuple(f for f in fields if f != "id"))
+    where, params = [], []
+    if after:
+        where.append("id > ?")
+        params.append(after)
+    if category:
+        where.append("category = ?")
+        params.append(category)
+    if source_type:
+        where.append("source_type = ?")
+        params.append(source_type)
+    sql = f"SELECT {columns} FROM {table} {join}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY id LIMIT ?"
+    # Fetch one extra row to learn whether another page follows
+    rows = get_db().execute(sql, params + [limit + 1]).fetchall()
+    next_after = rows[limit - 1]["id"] if len(rows) > limit else None
+    return rows[:limit], next_after
+
+
+def get_recipes_page(after=None, limit=API_PAGE_SIZE, category=None, source_type=None,
+                     fields=RECIPE_API_FIELDS):
+    """Keyset page of recipes ordered by id. Returns (rows, next_after)."""
+    return _api_page("recipe_cards", fields, after, limit, category, source_type)
+
+
+def get_tips_page(after=None, limit=API_PAGE_SIZE, category=None, source_type=None,
+                  fields=TIP_API_FIELDS):
+    """Keyset page of tips ordered by id. Returns (rows, next_after)."""
+    return _api_page("food_tips", fields, after, limit, category, source_type)
+
+
+def get_recipe_docs_page(after=None, limit=API_PAGE_SIZE, category=None, source_type=None):
+    """Like get_recipes_page with the default fields, as stored JSON documents."""
+    rows, next_after = _api_page(
+        "recipe_cards", ("doc",), after, limit, category, source_type,
+        join="JOIN recipe_docs ON recipe_id = id",
+    )
+    return [r["doc"] for r in rows], next_after
+
+
+def get_tips_docs_page(after=None, limit=API_PAGE_SIZE, category=None, source_type=None):
+    """Like get_tips_page with the default fields, as stored JSON documents."""
+    rows, next_after = _api_page(
+        "food_tips", ("doc",), after, limit, category, source_type,
+        join="JOIN tip_docs ON tip_id = id",
+    )
+    return [r["doc"] for r in rows], next_after
+
+
+def get_recipe_doc(recipe_id):
+    row = get_db().execute("SELECT doc FROM recipe_docs WHERE recipe_id = ?", (recipe_id,)).fetchone()
+    return row["doc"] if row else None
+
+
+def get_tip_doc(tip_id):
+    row = get_db().execute("SELECT doc FROM tip_docs WHERE tip_id = ?", (tip_id,)).fetchone()
+    return row["doc"] if row else None
+
+
+def iter_export():
+    """Yield ("recipe" | "tip", JSON document text) for every row, one row in memory at a time.
+
+    Uses a dedicated connection and a single read transaction so the
+    generator can outlive the request's connection and sees a consistent
+    snapshot of both tables.
+    """
+    conn = connect()
+    try:
+        conn.execute("BEGIN")
+        cursor = conn.execute(
+            "SELECT d.doc FROM recipe_cards r JOIN recipe_docs d ON d.recipe_id = r.id ORDER BY r.title"
+        )
+        for r in cursor:
+            yield "recipe", r[0]
+        cursor = conn.execute(
+            "SELECT d.doc FROM food_tips t JOIN tip_docs d ON d.tip_id = t.id ORDER BY t.title"
+        )
+        for t in cursor:
+            yield "tip", t[0]
+    finally:
+        conn.close()
 
 
 def export_all():
+    recipe_list, tip_list = [], []
+    for kind, doc in iter_export():
+        (recipe_list if kind == "recipe" else tip_list).append(json.loads(doc))
+    return recipe_list, tip_list
+
+
+SEARCH_LIMIT = 50
+
+# bm25 column weights: a title hit outranks an ingredient/item hit, which
+# outranks a mention in the directions or notes.
+_RECIPE_WEIGHTS = "10.0, 4.0, 1.0, 1.0"
+_TIP_WEIGHTS = "10.0, 3.0, 1.0"
+
+
+def _words(text):
+    return "".join(ch if ch.isalnum() else " " for ch in text).split()
+
+
+def _match_expression(query):
+    """Turn free text into an FTS5 query: every word must match as a prefix."""
+    return " ".join(f'"{w}"*' for w in _words(query))
+
+
+def search(query, limit=SEARCH_LIMIT):
+    match = _match_expression(query)
+    if not match:
+        return [], []
     conn = get_db()
+    cutoff = new_cutoff()
     recipes = conn.execute(
-        "SELECT title, category, prep_time, cook_time, portion_count, "
-        "ingredients, directions, notes, source_conversation, created_at, source_type, highlight "
-        "FROM recipe_cards ORDER BY title"
+        "SELECT r.id, r.title, r.category, r.prep_time, r.cook_time, r.portion_count, "
+        "r.ingredient_count, r.source_type, r.highlight, r.created_at, r.created_at >= ? AS is_new "
+        "FROM recipe_fts JOIN recipe_cards r ON r.id = recipe_fts.rowid "
+        f"WHERE recipe_fts MATCH ? ORDER BY bm25(recipe_fts, {_RECIPE_WEIGHTS}) LIMIT ?",
+        (cutoff, match, limit),
     ).fetchall()
     tips = conn.execute(
-        "SELECT title, category, items, notes, source_conversation, created_at, source_type, highlight "
-        "FROM food_tips ORDER BY title"
+        "SELECT t.id, t.title, t.category, t.item_count, t.source_type, t.highlight, t.created_at, "
+        "t.created_at >= ? AS is_new "
+        "FROM tip_fts JOIN food_tips t ON t.id = tip_fts.rowid "
+        f"WHERE tip_fts MATCH ? ORDER BY bm25(tip_fts, {_TIP_WEIGHTS}) LIMIT ?",
+        (cutoff, match, limit),
     ).fetchall()
-    conn.close()
-
-    recipe_list = []
-    for r in recipes:
-        recipe_list.append({
-            "title": r["title"],
-            "category": r["category"],
-            "prep_time": r["prep_time"],
-            "cook_time": r["cook_time"],
-            "portion_count": r["portion_count"],
-            "ingredients": json.loads(r["ingredients"]) if r["ingredients"] else [],
-            "directions": json.loads(r["directions"]) if r["directions"] else [],
-            "notes": r["notes"],
-            "source_conversation": r["source_conversation"],
-            "created_at": r["created_at"],
-            "source_type": r["source_type"] or "ai",
-            "highlight": bool(r["highlight"]),
-        })
+    return recipes, tips
 
-    tip_list = []
-    for t in tips:
-        tip_list.append({
-            "title": t["title"],
-            "category": t["category"],
-            "items": json.loads(t["items"]) if t["items"] else [],
-            "notes": t["notes"],
-            "source_conversation": t["source_conversation"],
-            "created_at": t["created_at"],
-            "source_type": t["source_type"] or "ai",
-            "highlight": bool(t["highlight"]),
-        })
 
-    return recipe_list, tip_list
+# Typeahead and typo tolerance over suggest_terms
+
+SUGGEST_LIMIT = 8
+FUZZY_CANDIDATES = 50
+FUZZY_THRESHOLD = 0.3  # trigram Jaccard similarity, as pg_trgm's default
+
+
+def _trigrams(word):
+    """pg_trgm-style trigrams: the word padded with two spaces before and one after."""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _similarity(a, b):
+    ta, tb = _trigrams(a), _trigrams(b)
+    return len(ta & tb) / len(ta | tb)
+
+
+def _fuzzy_candidates(conn, words, limit=FUZZY_CANDIDATES):
+    """suggest_terms rows sharing the most (rarest) trigrams with `words`."""
+    grams = {w[i:i + 3] for w in words for i in range(len(w) - 2)}
+    if not grams:
+        return []
+    match = " OR ".join('"' + g.replace('"', '""') + '"' for g in sorted(grams))
+    return conn.execute(
+        "SELECT t.term, t.phrase, t.uses FROM suggest_fts JOIN suggest_terms t ON t.id = suggest_fts.rowid "
+        "WHERE suggest_fts MATCH ? ORDER BY bm25(suggest_fts) LIMIT ?",
+        (match, limit),
+    ).fetchall()
+
 
+def _phrase_score(words, term):
+    """Mean, over `words`, of each word's best similarity to a word of `term`."""
+    term_words = _words(term) or [term]
+    return sum(max(_similarity(w, t) for t in term_words) for w in words) / len(words)
 
-def search(query):
+
+def suggest(query, limit=SUGGEST_LIMIT):
+    """Typeahead phrases (titles, ingredient and item names) for a partial query.
+
+    Phrases starting with the query come first, then ones with a word
+    starting with it, then other substring matches, each by number of uses.
+    Short lists are topped up with typo-tolerant matches.
+    """
+    term = " ".join(query.lower().split())
+    if not term:
+        return []
     conn = get_db()
-    q = f"%{query}%"
-    recipes = conn.execute(
-        "SELECT id, title, category, prep_time, cook_time, portion_count, "
-        "ingredients, notes, source_type, highlight, created_at FROM recipe_cards "
-        "WHERE title LIKE ? OR ingredients LIKE ? OR notes LIKE ? "
-        "ORDER BY highlight DESC, title",
-        (q, q, q),
+    if len(term) < 3:
+        # Below the trigram length: prefix range scan on the unique index
+        rows = conn.execute(
+            "SELECT phrase FROM suggest_terms WHERE term >= ? AND term < ? ORDER BY uses DESC, term LIMIT ?",
+            (term, term + "\uffff", limit),
+        ).fetchall()
+        return [r["phrase"] for r in rows]
+
+    rows = conn.execute(
+        "SELECT t.phrase FROM suggest_fts JOIN suggest_terms t ON t.id = suggest_fts.rowid "
+        "WHERE suggest_fts MATCH ? ORDER BY "
+        "substr(t.term, 1, length(?)) = ? DESC, instr(' ' || t.term, ' ' || ?) > 0 DESC, "
+        "t.uses DESC, t.term LIMIT ?",
+        ('"' + term.replace('"', '""') + '"', term, term, term, limit),
     ).fetchall()
-    tips = conn.execute(
-        "SELECT id, title, category, items, notes, source_type, highlight, created_at FROM food_tips "
-        "WHERE title LIKE ? OR items LIKE ? OR notes LIKE ? "
-        "ORDER BY highlight DESC, title",
-        (q, q, q),
+    phrases = [r["phrase"] for r in rows]
+    words = _words(term)
+    if len(phrases) < limit and words:
+        seen = set(phrases)
+        scored = [
+            (score, r["uses"], r["phrase"])
+            for r in _fuzzy_candidates(conn, words)
+            if r["phrase"] not in seen and (score := _phrase_score(words, r["term"])) >= FUZZY_THRESHOLD
+        ]
+        scored.sort(key=lambda s: (-s[0], -s[1], s[2]))
+        phrases += [phrase for _, _, phrase in scored[:limit - len(phrases)]]
+    return phrases
+
+
+def correct_query(query):
+    """`query` with each word that matches nothing replaced by the closest vocabulary word.
+
+    Returns None when no word needed (or could get) a correction.
+    """
+    words = _words(query.lower())
+    conn = get_db()
+    corrected, changed = [], False
+    for word in words:
+        known = len(word) < 3 or any(
+            conn.execute(f"SELECT 1 FROM {fts} WHERE {fts} MATCH ? LIMIT 1", (f'"{word}"*',)).fetchone()
+            for fts in ("recipe_fts", "tip_fts")
+        )
+        best = None
+        if not known:
+            best_score = FUZZY_THRESHOLD
+            for r in _fuzzy_candidates(conn, [word]):
+                for candidate in _words(r["term"]):
+                    score = _similarity(word, candidate)
+                    if score > best_score:
+                        best, best_score = candidate, score
+        corrected.append(best or word)
+        changed = changed or best is not None
+    return " ".join(corrected) if changed else None
+
+
+# Ingredient index ("cook with what I have")
+
+COOK_LIMIT = 50
+
+_STOP_WORDS = {
+    "a", "an", "and", "or", "of", "the", "to", "for", "with", "taste", "fresh", "large",
+    "small", "medium", "optional", "chopped", "minced", "diced", "sliced", "divided",
+}
+# Words whose trailing "s" is not a plural
+_KEEP_S = {"asparagus", "couscous", "hummus", "molasses", "swiss", "grits", "citrus", "bass", "floss"}
+_IRREGULAR = {"leaves": "leaf", "halves": "half", "loaves": "loaf", "knives": "knife"}
+
+
+def _singular(word):
+    if word in _IRREGULAR:
+        return _IRREGULAR[word]
+    if word in _KEEP_S or len(word) <= 3:
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes", "sses", "xes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def normalize_ingredient(name):
+    """Canonical ingredient name: lowercase, singular words, no punctuation or notes.
+
+    "Cherry Tomatoes (halved)" -> "cherry tomato"
+    """
+    name = str(name or "").lower().split(",")[0]
+    name = re.sub(r"\([^)]*\)", " ", name)
+    words = re.findall(r"[a-z0-9]+(?:['-][a-z0-9]+)*", name)
+    return " ".join(_singular(w) for w in words)
+
+
+@lru_cache(maxsize=8192)
+def ingredient_terms(name):
+    """Index terms for one ingredient: its full normalized name plus each word.
+
+    Cached: bulk writes (imports, rebuilds) see the same names over and over.
+    """
+    full = normalize_ingredient(name)
+    if not full:
+        return frozenset()
+    return frozenset([full]).union(w for w in full.split() if w not in _STOP_WORDS and not w.isdigit())
+
+
+def _index_ingredients(conn, recipes, replace=True):
+    """Write posting rows for [(recipe_id, ingredients list)] pairs."""
+    if replace:
+        conn.executemany(
+            "DELETE FROM recipe_ingredients WHERE recipe_id = ?", [(rid,) for rid, _ in recipes]
+        )
+    rows = []
+    for recipe_id, ingredients in recipes:
+        for position, ing in enumerate(ingredients or []):
+            name = ing.get("name") if isinstance(ing, dict) else ing
+            if not isinstance(name, str):
+                name = str(name or "")
+            rows.extend((term, recipe_id, position) for term in ingredient_terms(name))
+    if rows:
+        conn.executemany(
+            "INSERT OR IGNORE INTO recipe_ingredients (term, recipe_id, position) VALUES (?, ?, ?)",
+            rows,
+        )
+
+
+def cook_with(ingredients, rank="coverage", match="any", limit=COOK_LIMIT):
+    """Recipes using the given ingredients, best first.
+
+    Only the posting lists of the requested terms are read; grouping them
+    by recipe gives, per recipe, how many requested terms it uses and how
+    many of its own ingredients those cover. rank="coverage" orders by the
+    share of the recipe's ingredients on hand, rank="missing" by how many
+    are still missing. match="all" keeps only recipes using every term.
+
+    Returns (terms, rows); each row has matched/missing counts and the
+    matched ingredient positions.
+    """
+    terms = sorted({normalize_ingredient(i) for i in ingredients} - {""})
+    if not terms:
+        return [], []
+    placeholders = ", ".join("?" * len(terms))
+    having = "HAVING COUNT(DISTINCT ri.term) = ?" if match == "all" else ""
+    order = {
+        "coverage": "coverage DESC, missing ASC, used_terms DESC, r.title",
+        "missing": "missing ASC, coverage DESC, used_terms DESC, r.title",
+    }[rank]
+    params = [new_cutoff()] + terms + ([len(terms)] if match == "all" else []) + [limit]
+    rows = get_db().execute(
+        "SELECT r.id, r.title, r.category, r.prep_time, r.cook_time, r.portion_count, "
+        "r.ingredient_count, r.source_type, r.highlight, r.created_at, r.created_at >= ? AS is_new, "
+        "m.used_terms, m.matched, max(r.ingredient_count - m.matched, 0) AS missing, "
+        "CAST(m.matched AS REAL) / max(r.ingredient_count, 1) AS coverage, m.positions, r.ingredients "
+        "FROM ("
+        "   SELECT ri.recipe_id, COUNT(DISTINCT ri.term) AS used_terms, "
+        "   COUNT(DISTINCT ri.position) AS matched, group_concat(DISTINCT ri.position) AS positions "
+        f"  FROM recipe_ingredients ri WHERE ri.term IN ({placeholders}) "
+        f"  GROUP BY ri.recipe_id {having}"
+        ") m JOIN recipe_cards r ON r.id = m.recipe_id "
+        f"ORDER BY {order} LIMIT ?",
+        params,
     ).fetchall()
-    conn.close()
-    return recipes, tips
+    return terms, rows
+
@@ -1,66 +1,241 @@
+"""Discord webhook notifications.
+
+Records are announced through an outbox: the insert helpers in db.py queue
+an event row in the same transaction as the record, and a background
+worker delivers queued events with retries and backoff. Request latency
+never depends on Discord.
+
+The worker runs as a daemon thread in each app process (start_worker), or
+on its own with `python discord.py` when DISCORD_WORKER=off is set for the
+web processes.
+"""
+
 import logging
 import os
+import threading
+import time
 
 import requests
 
+import db
+import metrics
+
 log = logging.getLogger(__name__)
 
 DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL", "")
 SITE_URL = os.getenv("SITE_URL", "").rstrip("/")
+DISCORD_WORKER = os.getenv("DISCORD_WORKER", "thread")  # "thread" or "off"
 
 EMBED_COLOR = 0x10B981  # emerald-500
 
+# Discord allows 10 embeds and 6000 characters of embed text per message
+MAX_EMBEDS = 10
+MAX_EMBED_CHARS = 6000
+
+POLL_INTERVAL = 5  # seconds between outbox checks when idle
+COALESCE_WINDOW = 1.0  # seconds to let a burst accumulate before sending
+LEASE_SECONDS = 60
+MAX_ATTEMPTS = 8
+MAX_BACKOFF = 3600
+
+BATCH_LIST_LIMIT = 20
+
+
+def enabled():
+    return bool(DISCORD_WEBHOOK_URL)
+
+
+# --- Embeds ---
 
-def notify_new_recipe(data, row_id):
-    if not DISCORD_WEBHOOK_URL:
-        return
-    url = f"{SITE_URL}/recipes/{row_id}"
+
+def _recipe_embed(event):
     fields = [
-        {"name": "Category", "value": data.get("category", "—").capitalize(), "inline": True},
+        {"name": "Category", "value": (event.get("category") or "—").capitalize(), "inline": True},
     ]
-    cook = data.get("cook_time")
+    cook = event.get("cook_time")
     if cook:
         fields.append({"name": "Cook time", "value": f"{cook} min", "inline": True})
-    portion = data.get("portion_count")
+    portion = event.get("portion_count")
     if portion:
         fields.append({"name": "Serves", "value": str(portion), "inline": True})
-    ingredients = data.get("ingredients", [])
+    ingredients = event.get("ingredient_count")
     if ingredients:
-        fields.append({"name": "Ingredients", "value": f"{len(ingredients)} items", "inline": True})
-    _send({
-        "embeds": [{
-            "title": data.get("title", "Untitled"),
-            "url": url,
-            "description": "_**Recipe**_",
-            "color": EMBED_COLOR,
-            "fields": fields,
-        }],
-    })
-
-
-def notify_new_tip(data, row_id):
-    if not DISCORD_WEBHOOK_URL:
-        return
-    url = f"{SITE_URL}/tips/{row_id}"
+        fields.append({"name": "Ingredients", "value": f"{ingredients} items", "inline": True})
+    return {
+        "title": event.get("title") or "Untitled",
+        "url": f"{SITE_URL}/recipes/{event['id']}",
+        "description": "_**Recipe**_",
+        "color": EMBED_COLOR,
+        "fields": fields,
+    }
+
+
+def _tip_embed(event):
     fields = [
-        {"name": "Category", "value": data.get("category", "—").capitalize(), "inline": True},
+        {"name": "Category", "value": (event.get("category") or "—").capitalize(), "inline": True},
     ]
-    items = data.get("items", [])
+    items = event.get("item_count")
     if items:
-        fields.append({"name": "Items", "value": str(len(items)), "inline": True})
-    _send({
-        "embeds": [{
-            "title": data.get("title", "Untitled"),
-            "url": url,
-            "description": "_**Food Tip**_",
-            "color": EMBED_COLOR,
-            "fields": fields,
-        }],
-    })
+        fields.append({"name": "Items", "value": str(items), "inline": True})
+    return {
+        "title": event.get("title") or "Untitled",
+        "url": f"{SITE_URL}/tips/{event['id']}",
+        "description": "_**Food Tip**_",
+        "color": EMBED_COLOR,
+        "fields": fields,
+    }
+
+
+def _batch_embed(event):
+    recipes, tips = event["recipes"], event["tips"]
+    if len(recipes) + len(tips) == 1:
+        return _recipe_embed(recipes[0]) if recipes else _tip_embed(tips[0])
+    lines = [f"[{r['title']}]({SITE_URL}/recipes/{r['id']})" for r in recipes]
+    lines += [f"[{t['title']}]({SITE_URL}/tips/{t['id']})" for t in tips]
+    hidden = len(lines) - BATCH_LIST_LIMIT
+    lines = lines[:BATCH_LIST_LIMIT]
+    if hidden > 0:
+        lines.append(f"_…and {hidden} more_")
+    counts = []
+    if recipes:
+        counts.append(f"{len(recipes)} recipe{'s' if len(recipes) != 1 else ''}")
+    if tips:
+        counts.append(f"{len(tips)} tip{'s' if len(tips) != 1 else ''}")
+    return {
+        "title": f"Added {' and '.join(counts)}",
+        "description": "\n".join(lines),
+        "color": EMBED_COLOR,
+    }
+
+
+_EMBED_BUILDERS = {"recipe": _recipe_embed, "tip": _tip_embed, "batch": _batch_embed}
+
+
+def _embed_chars(embed):
+    total = len(embed.get("title", "")) + len(embed.get("description", ""))
+    for field in embed.get("fields", []):
+        total += len(field["name"]) + len(field["value"])
+    return total
+
+
+def _messages(claimed):
+    """Coalesce claimed (id, event, attempts) rows into webhook payloads.
+
+    Yields (ids, payload) pairs, each within Discord's per-message limits.
+    """
+    ids, embeds, chars = [], [], 0
+    for row_id, event, _ in claimed:
+        embed = _EMBED_BUILDERS[event["kind"]](event)
+        size = _embed_chars(embed)
+        if embeds and (len(embeds) == MAX_EMBEDS or chars + size > MAX_EMBED_CHARS):
+            yield ids, {"embeds": embeds}
+            ids, embeds, chars = [], [], 0
+        ids.append(row_id)
+        embeds.append(embed)
+        chars += size
+    if embeds:
+        yield ids, {"embeds": embeds}
+
+
+# --- Delivery ---
 
 
 def _send(payload):
+    """POST one payload. Returns None on success, else (error, retry_after)."""
     try:
-        requests.post(DISCORD_WEBHOOK_URL, json=payload, timeout=5)
-    except Exception:
-        log.exception("Discord webhook failed")
+        resp = requests.post(DISCORD_WEBHOOK_URL, json=payload, timeout=5)
+    except requests.RequestException as e:
+        return str(e), None
+    if resp.status_code == 429:
+        try:
+            retry_after = float(resp.json().get("retry_after", 1))
+        except ValueError:
+            retry_after = 1.0
+        return "rate limited", retry_after
+    if resp.status_code >= 400:
+        return f"HTTP {resp.status_code}: {resp.text[:200]}", None
+    return None
+
+
+def _backoff(attempts):
+    return min(MAX_BACKOFF, 2 ** (attempts + 1))
+
+
+def deliver_pending():
+    """Deliver every due notification once. Returns the number delivered."""
+    delivered = 0
+    while True:
+        claimed = db.claim_notifications(MAX_EMBEDS, LEASE_SECONDS)
+        if not claimed:
+            return delivered
+        attempts = {row_id: n for row_id, _, n in claimed}
+        for ids, payload in _messages(claimed):
+            started = time.perf_counter()
+            result = _send(payload)
+            metrics.observe_webhook(time.perf_counter() - started, result is None)
+            if result is None:
+                db.complete_notifications(ids)
+                delivered += len(ids)
+                continue
+            error, retry_after = result
+            log.warning("Discord webhook failed: %s", error)
+            delay = retry_after if retry_after is not None else _backoff(max(attempts[i] for i in ids))
+            db.retry_notifications(ids, error, delay, MAX_ATTEMPTS)
+        if len(claimed) < MAX_EMBEDS:
+            return delivered
+
+
+class _Worker:
+    def __init__(self):
+        self.wakeup = threading.Event()
+        self.pid = os.getpid()
+        self.thread = threading.Thread(target=self.run, name="discord-outbox", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            if self.wakeup.wait(POLL_INTERVAL):
+                # Give a burst of uploads a moment to land so it goes out together
+                time.sleep(COALESCE_WINDOW)
+                self.wakeup.clear()
+            try:
+                deliver_pending()
+            except Exception:
+                log.exception("Discord outbox delivery failed")
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def start_worker():
+    """Start this process's delivery thread (no-op if disabled or already running)."""
+    global _worker
+    if not enabled() or DISCORD_WORKER == "off":
+        return None
+    with _worker_lock:
+        # A worker inherited across fork has no thread behind it
+        if _worker is None or _worker.pid != os.getpid():
+            _worker = _Worker()
+    return _worker
+
+
+def wake():
+    """Nudge the worker after queueing a notification."""
+    worker = start_worker()
+    if worker is not None:
+        worker.wakeup.set()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if not enabled():
+        raise SystemExit("DISCORD_WEBHOOK_URL is not set")
+    db.init_db()
+    log.info("Delivering Discord notifications every %ss", POLL_INTERVAL)
+    while True:
+        try:
+            deliver_pending()
+        except Exception:
+            log.exception("Discord outbox delivery failed")
+        time.sleep(POLL_INTERVAL)
@@ -0,0 +1,242 @@
+"""Incremental JSON reading for files too large (or too many) to json.load.
+
+Scanner walks a JSON document from a file object in fixed-size chunks.
+Values the caller wants are decoded with the standard decoder; everything
+else is skipped without building Python objects, and reading stops as
+soon as the caller stops asking.
+
+    with open(path, encoding="utf-8") as f:
+        create_time = find_key(f, "create_time")
+
+    with open(export_path, encoding="utf-8") as f:
+        for kind, record in iter_export(f):
+            ...
+"""
+
+import json
+import re
+
+CHUNK_SIZE = 64 * 1024
+
+MISSING = object()
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_STRUCTURAL = re.compile(r'["{}\[\]]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r"[,}\]\s]")
+_decoder = json.JSONDecoder()
+
+
+class Scanner:
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _more(self):
+        """Append the next chunk to the buffer, dropping what has been consumed."""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _error(self, message):
+        return ValueError(f"{message} near {self.buf[self.pos:self.pos + 40]!r}")
+
+    def peek(self):
+        """Next non-whitespace character (not consumed), or None at end of input."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._more():
+                return None
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise self._error(f"Expected {char!r}")
+        self.pos += 1
+
+    def read_value(self):
+        """Decode the next value."""
+        if self.peek() not in ('"', "{", "["):
+            # A number cut at the buffer edge would decode as a shorter one
+            while not _SCALAR_END.search(self.buf, self.pos) and self._more():
+                pass
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._more():
+                    continue
+                raise
+            self.pos = end
+            return value
+
+    def skip_value(self):
+        """Move past the next value without decoding it."""
+        char = self.peek()
+        if char == '"':
+            self.pos += 1
+            self._skip_string()
+        elif char in ("{", "["):
+            self.pos += 1
+            self._skip_nested()
+        elif char is None:
+            raise self._error("Unexpected end of input")
+        else:
+            while True:
+                match = _SCALAR_END.search(self.buf, self.pos)
+                if match:
+                    self.pos = match.start()
+                    return
+                if not self._more():
+                    self.pos = len(self.buf)
+                    return
+
+    def _skip_string(self):
+        # Positioned just after the opening quote
+        while True:
+            match = _STRING_SPECIAL.search(self.buf, self.pos)
+            if match is None or match.end() == len(self.buf) and match.group() == "\\":
+                # Need more input (including the character an escape applies to)
+                self.pos = match.start() if match else len(self.buf)
+                if not self._more():
+                    raise self._error("Unterminated string")
+                continue
+            if match.group() == "\\":
+                self.pos = match.end() + 1
+                continue
+            self.pos = match.end()
+            return
+
+    def _skip_nested(self):
+        # Positioned just after an opening brace or bracket
+        depth = 1
+        while depth:
+            match = _STRUCTURAL.search(self.buf, self.pos)
+            if match is None:
+                self.pos = len(self.buf)
+                if not self._more():
+                    raise self._error("Unterminated object or array")
+                continue
+            self.pos = match.end()
+            char = match.group()
+            if char == '"':
+                self._skip_string()
+            elif char in ("{", "["):
+                depth += 1
+            else:
+                depth -= 1
+
+    def object_keys(self):
+        """Iterate the keys of the object at the current position.
+
+        After each key the scanner sits on its value, which the caller must
+        consume with read_value, skip_value or array_items before asking for
+        the next key.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise self._error("Expected object key")
+            key = self.read_value()
+            self.expect(":")
+            yield key
+            char = self.peek()
+            self.pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise self._error("Expected ',' or '}'")
+
+    def array_items(self):
+        """Decode the items of the array at the current position, one at a time."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.read_value()
+            char = self.peek()
+            self.pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise self._error("Expected ',' or ']'")
+
+
+def find_key(f, key, chunk_size=CHUNK_SIZE):
+    """Value of `key` in the top-level object of `f`, or MISSING.
+
+    Stops reading as soon as the key has been found.
+    """
+    scanner = Scanner(f, chunk_size)
+    if scanner.peek() != "{":
+        return MISSING
+    for name in scanner.object_keys():
+        if name == key:
+            return scanner.read_value()
+        scanner.skip_value()
+    return MISSING
+
+
+_EXPORT_KINDS = {"recipes": "recipe", "tips": "tip"}
+
+
+def _typed(record):
+    if isinstance(record, dict):
+        return record.pop("type", None), record
+    return None, record
+
+
+def iter_export(f, chunk_size=CHUNK_SIZE):
+    """Yield ("recipe" | "tip" | None, record) from an export, one record at a time.
+
+    Reads both export formats: {"recipes": [...], "tips": [...]} (other
+    top-level keys are skipped) and NDJSON, where each object carries a
+    "type" ("recipe" | "tip"). A plain array of records, as accepted by
+    /api/upload/batch, also works. Records without a type yield None.
+    """
+    scanner = Scanner(f, chunk_size)
+    char = scanner.peek()
+    if char is None:
+        return
+    if char == "[":
+        for record in scanner.array_items():
+            yield _typed(record)
+        return
+    keys = scanner.object_keys()
+    first = next(keys, MISSING)
+    if first in _EXPORT_KINDS:
+        key = first
+        while key is not MISSING:
+            if key in _EXPORT_KINDS:
+                for record in scanner.array_items():
+                    yield _EXPORT_KINDS[key], record
+            else:
+                scanner.skip_value()
+            key = next(keys, MISSING)
+        return
+
+    # NDJSON: the first object has already been opened, so finish it key by key
+    record = {}
+    key = first
+    while key is not MISSING:
+        record[key] = scanner.read_value()
+        key = next(keys, MISSING)
+    while True:
+        yield _typed(record)
+        if scanner.peek() is None:
+            return
+        record = scanner.read_value()
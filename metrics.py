@@ -0,0 +1,192 @@
+"""Per-request phase timing and process-wide counters.
+
+Each request accumulates wall time per phase (SQL, JSON, template
+rendering) on flask.g; app.py turns that into a Server-Timing header and
+folds it into the per-route histograms rendered by prometheus_text().
+
+Metrics are per process: with several gunicorn workers, each scrape sees
+the worker that answered it.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context
+
+# Upper bounds in seconds (Prometheus "le" buckets)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+PHASES = ("db", "json", "render")
+
+_lock = threading.Lock()
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+
+# (route, method, status) -> count
+requests_total = {}
+# route -> Histogram of whole-request wall time
+request_seconds = {}
+# (route, phase) -> Histogram of time spent in that phase per request
+phase_seconds = {}
+# route -> SQL statements executed
+queries_total = {}
+
+webhook_seconds = Histogram()
+webhook_failures = 0
+
+
+# --- Per-request accounting ---
+
+
+def start_request():
+    g.timing_started = time.perf_counter()
+    g.timing = {phase: 0.0 for phase in PHASES}
+    g.query_count = 0
+
+
+def _add(phase, seconds):
+    if has_request_context() and "timing" in g:
+        g.timing[phase] += seconds
+
+
+def observe_query(seconds):
+    """Called by db.py for every statement execute and fetch."""
+    if has_request_context() and "timing" in g:
+        g.timing["db"] += seconds
+        g.query_count += 1
+
+
+def observe_fetch(seconds):
+    _add("db", seconds)
+
+
+@contextmanager
+def phase(name):
+    """Time a block of work against one of PHASES for the current request."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _add(name, time.perf_counter() - started)
+
+
+def template_started(sender, template, context, **extra):
+    if has_request_context():
+        g.setdefault("render_stack", []).append(time.perf_counter())
+
+
+def template_finished(sender, template, context, **extra):
+    if has_request_context() and g.get("render_stack"):
+        started = g.render_stack.pop()
+        # Only the outermost render counts; nested ones are already inside it
+        if not g.render_stack:
+            _add("render", time.perf_counter() - started)
+
+
+def finish_request(route, method, status):
+    """Record the finished request. Returns the Server-Timing header value."""
+    total = time.perf_counter() - g.timing_started
+    timing, queries = g.timing, g.query_count
+    with _lock:
+        key = (route, method, status)
+        requests_total[key] = requests_total.get(key, 0) + 1
+        request_seconds.setdefault(route, Histogram()).observe(total)
+        for name, seconds in timing.items():
+            phase_seconds.setdefault((route, name), Histogram()).observe(seconds)
+        queries_total[route] = queries_total.get(route, 0) + queries
+    parts = [f'db;dur={timing["db"] * 1000:.2f};desc="{queries} queries"']
+    parts += [f"{name};dur={timing[name] * 1000:.2f}" for name in PHASES if name != "db"]
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+def observe_webhook(seconds, ok):
+    global webhook_failures
+    with _lock:
+        webhook_seconds.observe(seconds)
+        if not ok:
+            webhook_failures += 1
+
+
+# --- Exposition ---
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+def _histogram_lines(name, hist, **labels):
+    cumulative = 0
+    for bound, n in zip(BUCKETS, hist.counts):
+        cumulative += n
+        yield f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}"
+    yield f'{name}_bucket{_labels(**labels, le="+Inf")} {hist.count}'
+    yield f"{name}_sum{_labels(**labels) if labels else ''} {hist.sum:.6f}"
+    yield f"{name}_count{_labels(**labels) if labels else ''} {hist.count}"
+
+
+def prometheus_text(counters):
+    """Render everything in the Prometheus text format.
+
+    `counters` is a list of (name, help, value) for values owned elsewhere
+    (cache hit/miss counts and the like), read at scrape time.
+    """
+    lines = []
+    with _lock:
+        lines += [
+            "# HELP chatty_requests_total Requests handled, by route, method and status.",
+            "# TYPE chatty_requests_total counter",
+        ]
+        for (route, method, status), n in sorted(requests_total.items()):
+            lines.append(f"chatty_requests_total{_labels(route=route, method=method, status=status)} {n}")
+
+        lines += [
+            "# HELP chatty_request_duration_seconds Wall time per request.",
+            "# TYPE chatty_request_duration_seconds histogram",
+        ]
+        for route, hist in sorted(request_seconds.items()):
+            lines += _histogram_lines("chatty_request_duration_seconds", hist, route=route)
+
+        lines += [
+            "# HELP chatty_request_phase_seconds Time per request spent in SQL (db), JSON and template rendering.",
+            "# TYPE chatty_request_phase_seconds histogram",
+        ]
+        for (route, name), hist in sorted(phase_seconds.items()):
+            lines += _histogram_lines("chatty_request_phase_seconds", hist, route=route, phase=name)
+
+        lines += [
+            "# HELP chatty_sql_queries_total SQL statements executed, by route.",
+            "# TYPE chatty_sql_queries_total counter",
+        ]
+        for route, n in sorted(queries_total.items()):
+            lines.append(f"chatty_sql_queries_total{_labels(route=route)} {n}")
+
+        lines += [
+            "# HELP chatty_webhook_duration_seconds Discord webhook POST time.",
+            "# TYPE chatty_webhook_duration_seconds histogram",
+        ]
+        lines += _histogram_lines("chatty_webhook_duration_seconds", webhook_seconds)
+        lines += [
+            "# HELP chatty_webhook_failures_total Discord webhook POSTs that failed or were rate limited.",
+            "# TYPE chatty_webhook_failures_total counter",
+            f"chatty_webhook_failures_total {webhook_failures}",
+        ]
+
+    for name, help_text, value in counters:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter", f"{name} {value}"]
+    return "\n".join(lines) + "\n"
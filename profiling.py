@@ -0,0 +1,107 @@
+"""On-demand cProfile capture of single requests.
+
+app.py starts a profiler only for requests that ask for one, so ordinary
+requests never touch cProfile. Each capture is dumped as a .pstats file
+(loadable with pstats or snakeviz) into PROFILE_DIR, keeping the newest
+PROFILE_KEEP files.
+"""
+
+import cProfile
+import logging
+import os
+import pstats
+import re
+from datetime import datetime, timezone
+from urllib.parse import quote, unquote
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(BASE_DIR, "profiles"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+# Byte budget for the quoted path; keeps names under the 255-byte limit
+_PATH_BYTES = 120
+
+log = logging.getLogger(__name__)
+
+# <utc time>_<method>_<status>_<ms>_<quoted path>.pstats
+_NAME = re.compile(r"^(\d{8}T\d{12})_([A-Z]+)_(\d{3})_(\d+)_(.*)\.pstats$")
+
+
+def start():
+    """Start profiling the current thread. Returns None if a profiler is already active."""
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return None
+    return profiler
+
+
+def save(profiler, method, path, status, seconds):
+    """Stop `profiler`, write its stats and prune old files.
+
+    Returns the file name, or None if the stats could not be written.
+    """
+    profiler.disable()
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    name = f"{stamp}_{method}_{status}_{round(seconds * 1000)}_{_quote_path(path)}.pstats"
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        profiler.dump_stats(os.path.join(PROFILE_DIR, name))
+        for old in _names()[PROFILE_KEEP:]:
+            try:
+                os.remove(os.path.join(PROFILE_DIR, old))
+            except FileNotFoundError:
+                pass
+    except OSError as error:
+        log.warning("Could not save profile %s: %s", name, error)
+        return None
+    return name
+
+
+def _quote_path(path):
+    """`path` percent-encoded and cut to _PATH_BYTES without splitting an escape."""
+    quoted = quote(path, safe="")[:_PATH_BYTES]
+    cut = quoted.rfind("%", len(quoted) - 2)
+    return quoted[:cut] if cut != -1 else quoted
+
+
+def _names():
+    """Profile file names, newest first."""
+    try:
+        return sorted((n for n in os.listdir(PROFILE_DIR) if _NAME.match(n)), reverse=True)
+    except FileNotFoundError:
+        return []
+
+
+def exists(name):
+    return name in _names()
+
+
+def recent(limit=20):
+    profiles = []
+    for name in _names()[:limit]:
+        stamp, method, status, ms, path = _NAME.match(name).groups()
+        profiles.append({
+            "name": name,
+            "created_at": datetime.strptime(stamp, "%Y%m%dT%H%M%S%f").strftime("%Y-%m-%d %H:%M:%S"),
+            "method": method,
+            "status": int(status),
+            "ms": int(ms),
+            "path": unquote(path),
+        })
+    return profiles
+
+
+def top_functions(name, limit=15):
+    """The `limit` functions with the highest cumulative time in a saved profile."""
+    stats = pstats.Stats(os.path.join(PROFILE_DIR, name))
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        {
+            "function": pstats.func_std_string(func),
+            "calls": calls,
+            "tottime_ms": tottime * 1000,
+            "cumtime_ms": cumtime * 1000,
+        }
+        for func, (_, calls, tottime, cumtime, _) in rows
+    ]
@@ -0,0 +1,193 @@
+"""Backfill a column from a top-level key of per-conversation JSON files.
+
+Each recipe/tip whose source_conversation names a file in the directory
+gets that file's value for --key written to --column. Files are scanned in
+a process pool with jsonstream.find_key, so each one is only read up to
+the key. A manifest next to the files records each file's mtime, size and
+value; reruns only re-read files that changed and only write rows that
+still need the value (or, with --overwrite, rows of changed files).
+Updates are applied with executemany, one statement per file, in chunked
+transactions.
+
+Usage:
+    cd chatty-foods
+    .venv/Scripts/python scripts/backfill.py --dir zzexclude/original_food_conversations --key create_time --column created_at
+    .venv/Scripts/python scripts/backfill.py ... --dry-run
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import db
+import jsonstream
+
+TABLES = ("recipe_cards", "food_tips")
+CHUNK = 500  # files per write transaction
+PROGRESS_EVERY = 2.0  # seconds
+
+
+def _manifest_path(directory, key):
+    return os.path.join(directory, f".backfill-{key}.json")
+
+
+def _load_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_manifest(path, manifest):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, path)
+
+
+def _read_key(job):
+    path, key = job
+    try:
+        with open(path, encoding="utf-8") as f:
+            value = jsonstream.find_key(f, key)
+    except (OSError, ValueError) as e:
+        return path, None, str(e)
+    return path, (None if value is jsonstream.MISSING else value), None
+
+
+def _scan(directory, key, manifest, workers, force):
+    """Refresh manifest entries for new or changed files. Returns the changed file names."""
+    present, stale = set(), []
+    for entry in os.scandir(directory):
+        if not entry.name.endswith(".json") or entry.name.startswith("."):
+            continue
+        present.add(entry.name)
+        stat = entry.stat()
+        cached = manifest.get(entry.name)
+        if force or not cached or cached["mtime_ns"] != stat.st_mtime_ns or cached["size"] != stat.st_size:
+            stale.append((entry.name, stat))
+    for name in set(manifest) - present:
+        del manifest[name]
+
+    print(f"{len(present)} files, {len(stale)} new or changed")
+    changed = []
+    started = last = time.monotonic()
+    jobs = [(os.path.join(directory, name), key) for name, _ in stale]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(_read_key, jobs, chunksize=max(1, len(jobs) // (workers or os.cpu_count() or 1) // 8))
+        for i, ((name, stat), (_, value, error)) in enumerate(zip(stale, results), 1):
+            if error:
+                print(f"  Unreadable: {name}: {error}")
+                continue
+            manifest[name] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "value": value}
+            changed.append(name)
+            now = time.monotonic()
+            if now - last >= PROGRESS_EVERY:
+                print(f"  parsed {i}/{len(stale)} files ({i / (now - started):.0f}/s)")
+                last = now
+    return changed
+
+
+def _pending_files(conn, column, overwrite, changed):
+    """File names whose rows should be written."""
+    if overwrite:
+        return set(changed)
+    names = set()
+    for table in TABLES:
+        names.update(
+            r[0] for r in conn.execute(
+                f"SELECT DISTINCT source_conversation FROM {table} "
+                f"WHERE ({column} IS NULL OR {column} = '') AND source_conversation IS NOT NULL"
+            )
+        )
+    return names
+
+
+def _update_chunk(conn, statements, chunk):
+    return sum(conn.executemany(sql, chunk).rowcount for sql in statements)
+
+
+def backfill(directory, key, column, convert=None, workers=None, overwrite=False,
+             dry_run=False, force=False):
+    if not os.path.isdir(directory):
+        raise SystemExit(f"No such directory: {directory}")
+    db.init_db()
+    conn = db.get_db()
+    for table in TABLES:
+        if not db._has_column(conn, table, column):
+            raise SystemExit(f"{table} has no column {column}")
+
+    manifest_path = _manifest_path(directory, key)
+    manifest = _load_manifest(manifest_path)
+    changed = _scan(directory, key, manifest, workers, force)
+
+    pending = _pending_files(conn, column, overwrite, changed)
+    params = []
+    for name in sorted(pending):
+        entry = manifest.get(name)
+        if entry is None or entry["value"] is None:
+            continue
+        value = convert(entry["value"]) if convert else entry["value"]
+        params.append((value, name))
+    unmatched = sorted(n for n in pending if n not in manifest)
+
+    where = "source_conversation = ?"
+    if not overwrite:
+        where += f" AND ({column} IS NULL OR {column} = '')"
+
+    if dry_run:
+        for table in TABLES:
+            rows = sum(
+                conn.execute(f"SELECT COUNT(*) FROM {table} WHERE {where}", (name,)).fetchone()[0]
+                for _, name in params
+            )
+            print(f"  would update {rows} {table} rows")
+        for value, name in params[:10]:
+            print(f"  {name} -> {value!r}")
+        if len(params) > 10:
+            print(f"  ... and {len(params) - 10} more files")
+    else:
+        updated = 0
+        # updated_at keys the rendered page cache, so touched rows re-render
+        stamp = db._updated_now()
+        sql = [f"UPDATE {table} SET {column} = ?, updated_at = ? WHERE {where}" for table in TABLES]
+        for start in range(0, len(params), CHUNK):
+            chunk = [(value, stamp, name) for value, name in params[start:start + CHUNK]]
+            # Through the app's single writer, like every other data write
+            updated += db.write(_update_chunk, sql, chunk, block=True)
+            print(f"  wrote {min(start + CHUNK, len(params))}/{len(params)} files")
+        _save_manifest(manifest_path, manifest)
+        print(f"Updated {updated} rows from {len(params)} files")
+
+    for name in unmatched:
+        print(f"  No file: {name}")
+    db.close_db()
+
+
+def main(defaults=None, convert=None):
+    defaults = defaults or {}
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--dir", default=defaults.get("dir"), required="dir" not in defaults,
+                        help="directory of <source_conversation> JSON files")
+    parser.add_argument("--key", default=defaults.get("key"), required="key" not in defaults,
+                        help="top-level key to read from each file")
+    parser.add_argument("--column", default=defaults.get("column"), required="column" not in defaults,
+                        help="recipe_cards/food_tips column to fill")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count)")
+    parser.add_argument("--overwrite", action="store_true", help="also replace values already set")
+    parser.add_argument("--force", action="store_true", help="ignore the manifest and re-read every file")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    args = parser.parse_args()
+    backfill(
+        args.dir, args.key, args.column, convert=convert, workers=args.workers,
+        overwrite=args.overwrite, dry_run=args.dry_run, force=args.force,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Check the category_counts and recipe_facet_counts tables against the rows they count.
+
+Both tables are kept in sync by triggers, so a mismatch means the
+database was edited with the triggers missing (an old copy, a manual
+import with triggers dropped). Exits non-zero on a mismatch unless
+--rebuild is given, which recomputes the table.
+
+Usage:
+    cd chatty-foods
+    .venv/Scripts/python scripts/check_category_counts.py [--rebuild]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import db
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--rebuild", action="store_true", help="recompute the tables if they are out of sync")
+    args = parser.parse_args()
+
+    db.init_db()
+    out_of_sync = []
+    mismatches = db.check_category_counts()
+    for kind, category, stored, actual in mismatches:
+        print(f"  {kind} {category!r}: stored {stored}, actual {actual}")
+    if not mismatches:
+        print("category_counts is consistent.")
+    elif args.rebuild:
+        db.rebuild_category_counts()
+        print(f"Rebuilt category_counts ({len(mismatches)} categories were off).")
+    else:
+        out_of_sync.append(f"{len(mismatches)} categories")
+
+    mismatches = db.check_recipe_facet_counts()
+    for values, stored, actual in mismatches:
+        print(f"  recipe facets {values!r}: stored {stored}, actual {actual}")
+    if not mismatches:
+        print("recipe_facet_counts is consistent.")
+    elif args.rebuild:
+        db.rebuild_recipe_facet_counts()
+        print(f"Rebuilt recipe_facet_counts ({len(mismatches)} combinations were off).")
+    else:
+        out_of_sync.append(f"{len(mismatches)} facet combinations")
+
+    if out_of_sync:
+        raise SystemExit(f"{' and '.join(out_of_sync)} out of sync; rerun with --rebuild to fix.")
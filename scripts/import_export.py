@@ -0,0 +1,66 @@
+"""Import an export file (from /admin/export or /api/export) into the database.
+
+Accepts the JSON export, the NDJSON export (?format=ndjson) or a plain
+array of records. The file is parsed incrementally and written in
+transactions of --batch records, so memory use stays flat however large
+the file is. Records are matched on title + category + source_conversation:
+matches are updated in place, everything else is inserted, and re-importing
+the same file changes nothing.
+
+Usage:
+    cd chatty-foods
+    .venv/Scripts/python scripts/import_export.py chatty-foods-export.json
+    .venv/Scripts/python scripts/import_export.py - < export.ndjson
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import db
+import jsonstream
+
+
+def _summary(stats):
+    parts = [
+        f"{kind}s: {c['inserted']} inserted, {c['updated']} updated, {c['unchanged']} unchanged"
+        for kind, c in ((k, stats[k]) for k in ("recipe", "tip"))
+    ]
+    if stats["skipped"]:
+        parts.append(f"{stats['skipped']} invalid records skipped")
+    return "; ".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("path", help="export file, or - for stdin")
+    parser.add_argument("--batch", type=int, default=db.IMPORT_BATCH, help="records per transaction")
+    args = parser.parse_args()
+
+    db.init_db()
+    started = time.monotonic()
+
+    def progress(stats):
+        done = sum(sum(stats[k].values()) for k in ("recipe", "tip"))
+        print(f"  {done} records ({done / (time.monotonic() - started):.0f}/s)")
+
+    if args.path == "-":
+        f = sys.stdin
+    else:
+        f = open(args.path, encoding="utf-8")
+    try:
+        stats = db.import_records(jsonstream.iter_export(f), batch_size=args.batch, progress=progress)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+        db.close_db()
+
+    print(f"{_summary(stats)} in {time.monotonic() - started:.1f}s")
+    if stats["error"]:
+        raise SystemExit(f"Stopped at malformed input: {stats['error']}")
+
+
+if __name__ == "__main__":
+    main()
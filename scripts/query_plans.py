@@ -0,0 +1,93 @@
+"""Print EXPLAIN QUERY PLAN for every SQL statement the read helpers in db.py run.
+
+Each helper is called once with representative arguments while a trace
+callback records the statements it executes (with parameters bound), then
+each statement is explained. Look for "SCAN" lines: those are full table
+scans that an index should be covering.
+
+Usage:
+    cd chatty-foods
+    .venv/Scripts/python scripts/query_plans.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import db
+
+
+def _sample(conn, table, column, default):
+    row = conn.execute(f"SELECT {column} FROM {table} WHERE {column} IS NOT NULL LIMIT 1").fetchone()
+    return row[0] if row else default
+
+
+def helper_calls(conn):
+    recipe_category = _sample(conn, "recipe_cards", "category", "chicken")
+    tip_category = _sample(conn, "food_tips", "category", "storage")
+    conversation = _sample(conn, "recipe_cards", "source_conversation", "Conversation_2026-01-01")
+    return [
+        ("get_data_version", db.get_data_version, ()),
+        ("get_recipes", db.get_recipes, ()),
+        ("get_recipes(category)", db.get_recipes, ({"category": recipe_category},)),
+        ("get_recipes(category, after)", db.get_recipes, ({"category": recipe_category}, (1, "M", 1))),
+        ("get_recipes(source_type)", db.get_recipes, ({"source_type": "cookbook"},)),
+        ("get_recipes(category, source_type)", db.get_recipes,
+         ({"category": recipe_category, "source_type": "cookbook"},)),
+        ("get_recipes(total)", db.get_recipes, ({"total": "0-15"},)),
+        ("get_recipes(category, total)", db.get_recipes, ({"category": recipe_category, "total": "61-"},)),
+        ("get_recipe_facets", db.get_recipe_facets, ({"category": recipe_category},)),
+        ("get_recipe", db.get_recipe, (1,)),
+        ("get_recipe_header", db.get_recipe_header, (1,)),
+        ("get_tips", db.get_tips, ()),
+        ("get_tips(category)", db.get_tips, (tip_category,)),
+        ("get_tips(after)", db.get_tips, (None, (0, "M", 1))),
+        ("get_tip", db.get_tip, (1,)),
+        ("get_tip_header", db.get_tip_header, (1,)),
+        ("get_recipe_categories", db.get_recipe_categories, ()),
+        ("get_tip_categories", db.get_tip_categories, ()),
+        ("get_highlighted_recipes", db.get_highlighted_recipes, ()),
+        ("get_highlighted_tips", db.get_highlighted_tips, ()),
+        ("get_recent_recipes", db.get_recent_recipes, ()),
+        ("get_recent_tips", db.get_recent_tips, ()),
+        ("get_by_conversation", db.get_by_conversation, (conversation,)),
+        ("get_counts", db.get_counts, ()),
+        ("get_recipes_page", db.get_recipes_page, ()),
+        ("get_recipes_page(category)", lambda: db.get_recipes_page(after=1, category=recipe_category), ()),
+        ("get_recipes_page(source_type)", lambda: db.get_recipes_page(after=1, source_type="ai"), ()),
+        ("get_tips_page", db.get_tips_page, ()),
+        ("get_tips_page(category)", lambda: db.get_tips_page(after=1, category=tip_category), ()),
+        ("get_tips_page(source_type)", lambda: db.get_tips_page(after=1, source_type="ai"), ()),
+        ("get_recipe_doc", db.get_recipe_doc, (1,)),
+        ("get_recipe_docs_page(category)", lambda: db.get_recipe_docs_page(after=1, category=recipe_category), ()),
+        ("get_tips_docs_page", db.get_tips_docs_page, ()),
+        ("search", db.search, ("chicken",)),
+        ("cook_with", db.cook_with, (["chicken", "garlic", "soy sauce"],)),
+        ("cook_with(all)", lambda: db.cook_with(["chicken", "garlic"], match="all"), ()),
+    ]
+
+
+def main():
+    db.init_db()
+    conn = db.get_db()
+    for name, fn, args in helper_calls(conn):
+        statements = []
+        conn.set_trace_callback(statements.append)
+        try:
+            fn(*args)
+        finally:
+            conn.set_trace_callback(None)
+        print(f"== {name}")
+        for sql in statements:
+            # Skip SQLite's own bookkeeping (FTS5 shadow tables, nested comments)
+            if not sql.lstrip().upper().startswith("SELECT") or "'main'." in sql:
+                continue
+            print(f"  {' '.join(sql.split())}")
+            for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}"):
+                print(f"    {row['detail']}")
+        print()
+    db.close_db()
+
+
+if __name__ == "__main__":
+    main()
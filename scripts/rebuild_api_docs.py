@@ -0,0 +1,23 @@
+"""Regenerate the stored API JSON documents (recipe_docs / tip_docs).
+
+Triggers keep the documents in sync with every write, so this is only
+needed after changing the document shape in db.py (_RECIPE_DOC_ROW /
+_TIP_DOC_ROW) or editing the database outside the app.
+
+Usage:
+    cd chatty-foods
+    .venv/Scripts/python scripts/rebuild_api_docs.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import db
+
+
+if __name__ == "__main__":
+    db.init_db()
+    db.rebuild_api_docs()
+    recipe_count, tip_count = db.get_counts()
+    print(f"Done. Rebuilt documents for {recipe_count} recipes and {tip_count} tips.")
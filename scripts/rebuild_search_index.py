@@ -0,0 +1,25 @@
+"""Rebuild the full-text search, suggestion and ingredient indexes from the recipe_cards and food_tips rows.
+
+The indexes are kept in sync by triggers and the db.py write helpers, so
+this is only needed after editing the database outside the app, or to
+recover from a corrupted index.
+
+Usage:
+    cd chatty-foods
+    .venv/Scripts/python scripts/rebuild_search_index.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import db
+
+
+if __name__ == "__main__":
+    db.init_db()
+    db.rebuild_search_index()
+    db.rebuild_suggest_terms()
+    db.rebuild_ingredient_index()
+    recipe_count, tip_count = db.get_counts()
+    print(f"Done. Indexed {recipe_count} recipes and {tip_count} tips.")
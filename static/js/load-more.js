@@ -0,0 +1,64 @@
+// Incremental list loading: the "Load more" link carries the URL of the
+// next page of table rows (data-load-more). When the link scrolls into view
+// (or is clicked) the rows are fetched and appended to the table, and the
+// link moves on to the page named in the response's Link: rel="next" header.
+// Its href follows along (same cursor, page URL), so middle-clicking it or
+// the plain-link fallback opens the page after the rows already shown.
+// Without JavaScript the link is an ordinary link to the next page.
+document.addEventListener("DOMContentLoaded", function () {
+    var link = document.querySelector("[data-load-more]");
+    if (!link) return;
+    var tbody = document.querySelector("table tbody");
+    var loading = false;
+    var observer = null;
+
+    function nextUrl(response) {
+        var match = /<([^>]+)>;\s*rel="next"/.exec(response.headers.get("Link") || "");
+        return match ? match[1] : null;
+    }
+
+    function load() {
+        if (loading) return;
+        loading = true;
+        fetch(link.getAttribute("data-load-more"))
+            .then(function (response) {
+                if (!response.ok) throw new Error(response.status);
+                return response.text().then(function (html) {
+                    tbody.insertAdjacentHTML("beforeend", html);
+                    var next = nextUrl(response);
+                    if (next) {
+                        link.setAttribute("data-load-more", next);
+                        var page = new URL(link.href);
+                        page.searchParams.set("after", new URL(next, link.href).searchParams.get("after"));
+                        link.href = page.toString();
+                        // Still on screen (short page): the observer won't fire again
+                        if (observer && link.getBoundingClientRect().top < window.innerHeight) {
+                            setTimeout(load, 0);
+                        }
+                    } else {
+                        if (observer) observer.disconnect();
+                        link.parentElement.remove();
+                    }
+                });
+            })
+            .catch(function () {
+                // Leave the link in place as a plain next-page link
+                if (observer) observer.disconnect();
+            })
+            .then(function () {
+                loading = false;
+            });
+    }
+
+    link.addEventListener("click", function (e) {
+        e.preventDefault();
+        load();
+    });
+
+    if ("IntersectionObserver" in window) {
+        observer = new IntersectionObserver(function (entries) {
+            if (entries[0].isIntersecting) load();
+        }, { rootMargin: "400px" });
+        observer.observe(link);
+    }
+});
@@ -1,4 +1,6 @@
 import db
+import discord
 from app import app
 
 db.init_db()
+discord.start_worker()